@@ -8,6 +8,9 @@ Copyright (c) NREL. All rights reserved.
 from openmdao.main.api import Component, Assembly
 from openmdao.main.datatypes.api import Float, Bool, Int, Str, Array, Enum
 import numpy as np
+import itertools
+import heapq
+import multiprocessing
 from math import pi, cos, sqrt, radians, sin, exp, log10, log, floor, ceil
 import algopy
 import scipy as scp
@@ -18,6 +21,7 @@ from fusedwind.interface import implement_base
 from drivewpact.drive import NacelleBase
 from drivese_components import LowSpeedShaft_drive, Gearbox_drive, MainBearing_drive, SecondBearing_drive, Bedplate_drive, YawSystem_drive, LowSpeedShaft_drive3pt, \
     LowSpeedShaft_drive4pt, Transformer_drive, HighSpeedSide_drive, Generator_drive, NacelleSystemAdder_drive, AboveYawMassAdder_drive, RNASystemAdder_drive
+from drivese_utils import validate_drive_inputs, BEARING_TYPES, GEARBOX_CONFIGURATIONS
 
 @implement_base(NacelleBase)
 class Drive3pt(Assembly):
@@ -85,6 +89,15 @@ class Drive3pt(Assembly):
     Np = Array(np.array([0.0,0.0,0.0,]), iotype='in', desc='number of planets in each stage')
     mb1Type = Str(iotype='in',desc='Main bearing type: CARB, TRB or SRB')
     mb2Type = Str(iotype='in',desc= 'Carrier bearing type: CRB, TRB or RB')
+    bearing_selection = Enum('bore', ('bore','mass'), iotype='in', desc='main bearing selection from catalog: smallest bore or lightest bearing meeting bore and load rating')
+    length_search = Enum('root', ('root','step'), iotype='in', desc='search of shaft lengths on the bearing slope limit: bracketed root solve or fixed length steps')
+    section_search = Enum('root', ('root','step'), iotype='in', desc='sizing of the bedplate I-beams on the stress and deflection limits: bracketed root solve on the section scale or fixed dimension steps')
+    section_catalog = Enum('synthetic', ('synthetic','rolled','welded','standard'), iotype='in', desc='bedplate steel rear I-beam sections: grown synthetic section, or lightest rolled HEB beam, welded plate girder or either from the standard steel sections')
+    fatigue_tol = Float(0.01, iotype='in', units='m', desc='diameter resolution of the fatigue check')
+    shaft_profiles = Bool(False, iotype='in', desc='also output moment, slope and deflection profiles of the statically sized shaft')
+    warm_start = Bool(False, iotype='in', desc='start the iterative sizing of the shaft, gearbox and bedplate from their last converged state')
+    ratio_table = Bool(False, iotype='in', desc='interpolate optimal stage ratios in a table solved once per gearbox configuration and planet numbers')
+    ratio_solver = Enum('cobyla', ('cobyla','newton'), iotype='in', desc='optimal stage ratio solver: COBYLA on the constrained volume or newton steps with the ratio product eliminated')
 
     #Fatigue Parameters
     check_fatigue = Int(iotype = 'in', desc = 'turns on and off fatigue check. 0 if no fatigue check, 1 if unknown loads, 2 if known loads')
@@ -115,6 +128,13 @@ class Drive3pt(Assembly):
     rotor_Mz_distribution = Array(iotype='in', units ='N*m', desc = 'Mz distribution across turbine life')
     rotor_Mz_count = Array(iotype='in', desc = 'corresponding cycle-count array for Mz distribution') 
 
+    def check_inputs(self):
+        '''
+        Checks the inputs before the assembly is run. Returns a list of (input, message) for each problem found, empty if the case is valid.
+        '''
+
+        return validate_drive_inputs(self, '3pt')
+
     def configure(self):
 
         # select components
@@ -168,6 +188,15 @@ class Drive3pt(Assembly):
 
 
         self.connect('check_fatigue', 'lowSpeedShaft.check_fatigue')
+        self.connect('bearing_selection', 'lowSpeedShaft.bearing_selection')
+        self.connect('length_search', 'lowSpeedShaft.length_search')
+        self.connect('section_search', 'bedplate.section_search')
+        self.connect('section_catalog', 'bedplate.section_catalog')
+        self.connect('fatigue_tol', 'lowSpeedShaft.fatigue_tol')
+        self.connect('shaft_profiles', 'lowSpeedShaft.shaft_profiles')
+        self.connect('warm_start', ['lowSpeedShaft.warm_start', 'gearbox.warm_start', 'bedplate.warm_start'])
+        self.connect('ratio_table', 'gearbox.ratio_table')
+        self.connect('ratio_solver', 'gearbox.ratio_solver')
         self.connect('weibull_A', 'lowSpeedShaft.weibull_A')
         self.connect('weibull_k', 'lowSpeedShaft.weibull_k')
         self.connect('blade_number', ['lowSpeedShaft.blade_number'])
@@ -343,6 +372,15 @@ class Drive4pt(Assembly):
     carrier_mass = Float(iotype='in', units='kg', desc='Carrier mass')
     mb1Type = Str(iotype='in',desc='Main bearing type: CARB, TRB or SRB')
     mb2Type = Str(iotype='in',desc='Second bearing type: CARB, TRB or SRB')
+    bearing_selection = Enum('bore', ('bore','mass'), iotype='in', desc='main bearing selection from catalog: smallest bore or lightest bearing meeting bore and load rating')
+    length_search = Enum('root', ('root','step'), iotype='in', desc='search of shaft lengths on the bearing slope limit: bracketed root solve or fixed length steps')
+    section_search = Enum('root', ('root','step'), iotype='in', desc='sizing of the bedplate I-beams on the stress and deflection limits: bracketed root solve on the section scale or fixed dimension steps')
+    section_catalog = Enum('synthetic', ('synthetic','rolled','welded','standard'), iotype='in', desc='bedplate steel rear I-beam sections: grown synthetic section, or lightest rolled HEB beam, welded plate girder or either from the standard steel sections')
+    fatigue_tol = Float(0.01, iotype='in', units='m', desc='diameter resolution of the fatigue check')
+    shaft_profiles = Bool(False, iotype='in', desc='also output moment, slope and deflection profiles of the statically sized shaft')
+    warm_start = Bool(False, iotype='in', desc='start the iterative sizing of the shaft, gearbox and bedplate from their last converged state')
+    ratio_table = Bool(False, iotype='in', desc='interpolate optimal stage ratios in a table solved once per gearbox configuration and planet numbers')
+    ratio_solver = Enum('cobyla', ('cobyla','newton'), iotype='in', desc='optimal stage ratio solver: COBYLA on the constrained volume or newton steps with the ratio product eliminated')
     L_rb = Float(iotype='in', units='m', desc='distance between hub center and upwind main bearing')
     hss_length = Float(iotype = 'in', units = 'm', desc = 'high speed shaft length determined by user. Default 0.5m')
 
@@ -375,6 +413,13 @@ class Drive4pt(Assembly):
     rotor_Mz_distribution = Array(iotype='in', units ='N*m', desc = 'Mz distribution across turbine life')
     rotor_Mz_count = Array(iotype='in', desc = 'corresponding cycle-count array for Mz distribution') 
 
+    def check_inputs(self):
+        '''
+        Checks the inputs before the assembly is run. Returns a list of (input, message) for each problem found, empty if the case is valid.
+        '''
+
+        return validate_drive_inputs(self, '4pt')
+
     def configure(self):
 
         # select components
@@ -427,6 +472,15 @@ class Drive4pt(Assembly):
         self.connect('hss_length', 'highSpeedSide.length_in')
         self.connect('availability', 'lowSpeedShaft.availability')
         self.connect('check_fatigue', 'lowSpeedShaft.check_fatigue')
+        self.connect('bearing_selection', 'lowSpeedShaft.bearing_selection')
+        self.connect('length_search', 'lowSpeedShaft.length_search')
+        self.connect('section_search', 'bedplate.section_search')
+        self.connect('section_catalog', 'bedplate.section_catalog')
+        self.connect('fatigue_tol', 'lowSpeedShaft.fatigue_tol')
+        self.connect('shaft_profiles', 'lowSpeedShaft.shaft_profiles')
+        self.connect('warm_start', ['lowSpeedShaft.warm_start', 'gearbox.warm_start', 'bedplate.warm_start'])
+        self.connect('ratio_table', 'gearbox.ratio_table')
+        self.connect('ratio_solver', 'gearbox.ratio_solver')
         self.connect('fatigue_exponent', 'lowSpeedShaft.fatigue_exponent')
         self.connect('S_ut', ['lowSpeedShaft.S_ut'])
         self.connect('weibull_A', 'lowSpeedShaft.weibull_A')
@@ -648,6 +702,176 @@ class Drive4pt(Assembly):
 #         self.connect('nacelleSystem.nacelle_I', 'nacelle_I')
 
 
+#------------------------------------------------------------------
+#architecture search
+
+DRIVE_ARRANGEMENTS = {'3pt': Drive3pt, '4pt': Drive4pt}
+DRIVE_SHAFTS = {'3pt': LowSpeedShaft_drive3pt, '4pt': LowSpeedShaft_drive4pt}
+
+#nacelle inputs of the gearbox and low speed shaft of either arrangement, as (component input, nacelle input)
+GEARBOX_INPUTS = [('gear_ratio','gear_ratio'), ('ratio_type','ratio_type'), ('shaft_type','shaft_type'), ('rotor_torque','rotor_torque'),
+                  ('rotor_diameter','rotor_diameter'), ('ratio_table','ratio_table'), ('ratio_solver','ratio_solver'), ('cm_input','gearbox_cm')]
+SHAFT_INPUTS = [(name, name) for name in ['rotor_diameter', 'rotor_mass', 'machine_rating', 'rotor_bending_moment_x', 'rotor_bending_moment_y',
+                'rotor_bending_moment_z', 'rotor_force_x', 'rotor_force_y', 'rotor_force_z', 'shaft_angle', 'shaft_ratio', 'shrink_disc_mass',
+                'carrier_mass', 'mb1Type', 'mb2Type', 'flange_length', 'overhang', 'L_rb', 'check_fatigue', 'bearing_selection', 'length_search',
+                'fatigue_tol', 'fatigue_exponent', 'S_ut', 'weibull_A', 'weibull_k', 'blade_number', 'cut_in', 'cut_out', 'Vrated', 'T_life',
+                'IEC_Class', 'DrivetrainEfficiency', 'availability', 'rotor_thrust_distribution', 'rotor_thrust_count', 'rotor_Fy_distribution',
+                'rotor_Fy_count', 'rotor_Fz_distribution', 'rotor_Fz_count', 'rotor_torque_distribution', 'rotor_torque_count',
+                'rotor_My_distribution', 'rotor_My_count', 'rotor_Mz_distribution', 'rotor_Mz_count']] + [('rotor_freq','rotor_speed')]
+#components whose mass does not depend on the architecture, with their nacelle inputs
+FIXED_COMPONENTS = [(Generator_drive, [(name, name) for name in ['machine_rating', 'gear_ratio', 'drivetrain_design', 'rotor_diameter', 'rotor_speed']]),
+                    (YawSystem_drive, [(name, name) for name in ['rotor_diameter', 'rotor_thrust', 'tower_top_diameter']])]
+
+def gearbox_options(ratio_type, planet_numbers=(3,4,5)):
+    '''
+    (gear_configuration, Np) of every gearbox configuration modelled for the ratio type (GEARBOX_CONFIGURATIONS), with every combination of
+    planet numbers on the epicyclic stages.
+    '''
+
+    options = []
+    for config in GEARBOX_CONFIGURATIONS[ratio_type]:
+        stages = config.split('_')[0]
+        for planets in itertools.product(planet_numbers, repeat=stages.count('e')):
+            planets = list(planets)
+            Np = [planets.pop(0) if stage == 'e' else 1 for stage in stages]
+            options.append((config, Np + [0]*(3-len(Np))))
+    return options
+
+def _nacelle(arrangement, inputs, choices):
+    #nacelle of an arrangement with the architecture choices set over the inputs
+    nace = DRIVE_ARRANGEMENTS[arrangement]()
+    for name, value in inputs.items() + choices.items():
+        setattr(nace, name, value)
+    return nace
+
+def _architecture_mass(args):
+    #nacelle mass of an arrangement with the architecture choices set over the inputs, None if the inputs are invalid or the nacelle
+    #cannot be sized for any reason
+    [arrangement, inputs, choices] = args
+    nace = _nacelle(arrangement, inputs, choices)
+    if len(nace.check_inputs()) > 0:
+        return None
+    try:
+        nace.run()
+    except Exception:
+        return None
+    if not np.isfinite(nace.nacelle_mass):
+        return None
+    return float(nace.nacelle_mass)
+
+def _shaft_mass(args):
+    #mass of the low speed shaft and its main bearings with their housings of an arrangement with the architecture choices set over the
+    #inputs, sized alone on the mass, center of mass and length of its gearbox, 0 if the shaft cannot be sized
+    [arrangement, inputs, choices, gearbox] = args
+    nace = _nacelle(arrangement, inputs, choices)
+    lss = DRIVE_SHAFTS[arrangement]()
+    for [name, source] in SHAFT_INPUTS:
+        setattr(lss, name, getattr(nace, source))
+    [lss.gearbox_mass, lss.gearbox_cm, lss.gearbox_length] = gearbox
+    try:
+        lss.run()
+    except Exception:
+        return 0.
+    mass = lss.mass + (lss.bearing_mass1 + max(lss.bearing_mass2, 0.))*(1.0 + 8000.0/2700.0)
+    if not np.isfinite(mass):
+        return 0.
+    return float(mass)
+
+def architecture_search(inputs, arrangements=('3pt','4pt'), bearing_types=None, gearboxes=None, top=10, processes=1):
+    '''
+    Ranks drivetrain architectures by nacelle mass over every combination of arrangement ('3pt' or '4pt'), main bearing types mb1Type and
+    mb2Type and gearbox (gear_configuration, Np), with the other nacelle inputs taken from the dict inputs.  Gearboxes default to
+    gearbox_options of the ratio type and bearings to the standard types.
+
+    The architectures are sized in order of a lower bound on their nacelle mass, processes at a time on worker processes, until the
+    bound exceeds the mass of the top lightest found so far.  The nacelle mass adds the masses of its gearbox, low speed shaft and main
+    bearings to those of the generator and yaw system, which do not depend on the architecture.  Each gearbox and those components are
+    sized once, and the shaft and bearings of each arrangement and bearing pair on the lightest gearbox, far cheaper than sizing the
+    nacelle.  A heavier gearbox only adds to the loads of the shaft, bedplate, transformer and yaw system, so this bounds the nacelle
+    mass with any other gearbox by adding the difference in gearbox mass, and once the nacelle of the pair is sized with the lightest
+    gearbox its mass does likewise.  An architecture whose nacelle cannot be sized is infeasible.
+
+    Returns the top lightest feasible architectures, all of them if top is None, as dicts of the choices with their gearbox_mass and
+    nacelle_mass, lightest first.
+    '''
+
+    if bearing_types is None:
+        bearing_types = BEARING_TYPES
+    if gearboxes is None:
+        gearboxes = gearbox_options(inputs['ratio_type'])
+
+    #gearboxes and the components that do not depend on the architecture, on the nacelle inputs and defaults
+    nace = _nacelle(arrangements[0], inputs, {})
+    gearbox = []
+    for [config, Np] in gearboxes:
+        gbx = Gearbox_drive()
+        for [name, source] in GEARBOX_INPUTS:
+            setattr(gbx, name, getattr(nace, source))
+        gbx.gear_configuration = config
+        gbx.Np = Np
+        gbx.run()
+        gearbox.append((float(gbx.mass), np.array(gbx.cm), float(gbx.length)))
+    order = np.argsort([g[0] for g in gearbox])
+    fixed_mass = 0.
+    for [component, component_inputs] in FIXED_COMPONENTS:
+        comp = component()
+        for [name, source] in component_inputs:
+            setattr(comp, name, getattr(nace, source))
+        comp.run()
+        fixed_mass += comp.mass
+
+    branches = [(arrangement, mb1Type, mb2Type) for arrangement in arrangements for mb1Type in bearing_types for mb2Type in bearing_types]
+
+    def architecture(b, i):
+        return {'arrangement': branches[b][0], 'mb1Type': branches[b][1], 'mb2Type': branches[b][2], 'gear_configuration': gearboxes[i][0],
+                'Np': list(gearboxes[i][1]), 'gearbox_mass': gearbox[i][0]}
+
+    def choices(a):
+        return dict((name, a[name]) for name in ['mb1Type', 'mb2Type', 'gear_configuration', 'Np'])
+
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        map_architectures = pool.map
+    else:
+        pool = None
+        map_architectures = map
+    try:
+        #shaft and main bearings of every branch sized alone on the lightest gearbox
+        args = [(branches[b][0], inputs, choices(architecture(b, order[0])), gearbox[order[0]]) for b in range(len(branches))]
+        base = [fixed_mass + mass for mass in map_architectures(_shaft_mass, args)]
+
+        #bounds of every architecture, raised to the sized nacelle less its gearbox once a branch is sized with the lightest gearbox
+        queue = [(base[b] + gearbox[i][0], b, i) for b in range(len(branches)) for i in order]
+        heapq.heapify(queue)
+        ranked = []
+        while len(queue) > 0:
+            masses = sorted([a['nacelle_mass'] for a in ranked])
+            bound = masses[top-1] if top is not None and len(masses) >= top else np.inf
+            candidates = []
+            while len(queue) > 0 and len(candidates) < processes and queue[0][0] <= bound:
+                [lower, b, i] = heapq.heappop(queue)
+                if base[b] + gearbox[i][0] > lower:
+                    heapq.heappush(queue, (base[b] + gearbox[i][0], b, i))
+                else:
+                    candidates.append((b, i))
+            if len(candidates) == 0:
+                break
+            args = [(branches[b][0], inputs, choices(architecture(b, i))) for [b, i] in candidates]
+            for [b, i], mass in zip(candidates, map_architectures(_architecture_mass, args)):
+                if mass is not None:
+                    a = architecture(b, i)
+                    a['nacelle_mass'] = mass
+                    ranked.append(a)
+                    if i == order[0]:
+                        base[b] = max(base[b], mass - gearbox[i][0])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    ranked.sort(key=lambda a: a['nacelle_mass'])
+    return ranked[:top]
+
 #------------------------------------------------------------------
 #examples
 
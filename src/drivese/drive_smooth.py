@@ -19,6 +19,9 @@ from commonse.utilities import smooth_abs, vstack
 from drivewpact.drive import NacelleBase
 from drivewpact.drive import HighSpeedSide, Generator, AboveYawMassAdder, NacelleSystemAdder
 from fusedwind.interface import implement_base
+from drivese_utils import validate_drive_inputs, cached_stage_ratios, cache_stage_ratios, stage_ratio_table, interpolate_stage_ratios, stage_ratio_error_bound, \
+    epicyclic_stage_volume, parallel_stage_volume, solve_stage_ratios
+from shaft_beam import beam_moment, beam_slope, beam_deflection, beam_constants, beam_moment_max
 
 @implement_base(NacelleBase)
 class NacelleTS(Assembly):
@@ -87,6 +90,13 @@ class NacelleTS(Assembly):
     totalTipDefl_margin_front = Float(iotype='out')
 
 
+    def check_inputs(self):
+        '''
+        Checks the inputs before the assembly is run. Returns a list of (input, message) for each problem found, empty if the case is valid.
+        '''
+
+        return validate_drive_inputs(self, '4pt', ['CARB','SRB']) #bearing resizing has fits for CARB and SRB only
+
     def configure(self):
 
         # select components
@@ -260,19 +270,8 @@ class BearingSmooth(Component):
 
     def execute(self):
 
-        # setup spline for mass as function of diameter
-        dpt = [0.0, 0.1, 0.2, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.85, 0.95, 1.05, 1.15, 1.2, 1.3, 1.4]
-
-        if self.bearing_type == 'CARB':
-            mpt = [120.0, 120.0, 120.0, 120.0, 145.0, 225.0, 390.0, 645.0, 860.0, 1200.0, 1570.0, 2000.0, 2740.0, 2740.0, 2740.0, 2740.0]
-
-        elif self.bearing_type == 'SRB':
-            mpt = [128.7, 128.7, 128.7, 128.7, 220.0, 440.0, 715.0, 1200.0, 1600.0, 2000.0, 2350.0, 2700.0, 2960.0, 2960.0, 2960.0, 2960.0]
-
-        # TODO: TRB bearing type
-
-        spline = Akima(dpt, mpt, delta_x=0.0)
-        self.mass, self.dmass_dd = spline.interp(self.lss_diameter)
+        # spline for mass as function of diameter
+        self.mass, self.dmass_dd = bearing_mass_spline(self.bearing_type).interp(self.lss_diameter)
 
         # add housing weight
         self.mass += self.mass*(8000.0/2700.0)
@@ -710,12 +709,15 @@ class GearboxSmooth(Component):
     gear_configuration = Str(iotype='in', desc='string that represents the configuration of the gearbox (stage number and types)')
     ratio_type = Str(iotype='in', desc='optimal or empirical stage ratios')
     shaft_type = Str(iotype='in', desc='normal or short shaft length')
+    ratio_table = Bool(False, iotype='in', desc='interpolate optimal stage ratios in a table solved once per configuration and planet numbers')
+    ratio_solver = Enum('cobyla', ('cobyla', 'newton'), iotype='in', desc='optimal stage ratio solver: COBYLA on the constrained volume or newton steps with the ratio product eliminated')
 
     # outputs
     stage_masses = Array(np.array([0.0, 0.0, 0.0, 0.0]), iotype='out', units='kg', desc='individual gearbox stage masses')
     mass = Float(0.0, iotype='out', units='kg', desc='overall component mass')
     cm = Array(np.array([0.0, 0.0, 0.0]), iotype='out', desc='center of mass of the component in [x,y,z] for an arbitrary coordinate system')
     I = Array(np.array([0.0, 0.0, 0.0]), iotype='out', desc=' moments of Inertia for the component [Ixx, Iyy, Izz] around its center of mass')
+    stage_ratio_error = Float(0.0, iotype='out', desc='bound on the relative error of the interpolated stage ratios over the table interval of the gear ratio, zero when solved (ratio_table)')
 
 
 
@@ -726,7 +728,16 @@ class GearboxSmooth(Component):
         self.stageTorque = np.zeros([len(self.stageRatio), 1])  # filled in when ebxWeightEst is called
         self.stageMass = np.zeros([len(self.stageRatio), 1])  # filled in when ebxWeightEst is called
         self.stageType = self.stageTypeCalc(self.gear_configuration)
-        self.stageRatio = self.stageRatioCalc(self.gear_ratio, self.Np, self.ratio_type, self.gear_configuration)
+        self.stageRatio = None
+        self.stage_ratio_error = 0.0
+        if self.ratio_type == 'optimal' and self.ratio_table:
+            table = stage_ratio_table((type(self).__name__, self.ratio_solver, self.gear_configuration, tuple(np.ravel(self.Np))),
+                                      lambda r: self.stageRatioCalc(r, self.Np, self.ratio_type, self.gear_configuration))
+            self.stageRatio = interpolate_stage_ratios(table, self.gear_ratio)
+            if self.stageRatio is not None:
+                self.stage_ratio_error = stage_ratio_error_bound(table, self.gear_ratio)
+        if self.stageRatio is None:  # outside of the table
+            self.stageRatio = self.stageRatioCalc(self.gear_ratio, self.Np, self.ratio_type, self.gear_configuration)
 
 
         m = self.gbxWeightEst(self.gear_configuration, self.gear_ratio, self.Np, self.ratio_type, self.shaft_type, self.rotor_torque)
@@ -790,6 +801,10 @@ class GearboxSmooth(Component):
                 x = [overallRatio**(1.0/3.0), overallRatio**(1.0/3.0), overallRatio**(1.0/3.0)]
 
         elif ratio_type == 'optimal':
+            key = (type(self).__name__, self.ratio_solver, config, tuple(np.ravel(Np)), float(overallRatio))
+            x = cached_stage_ratios(key)
+            if x is not None:
+                return x
             x = np.zeros([3, 1])
 
             if config == 'eep':
@@ -808,7 +823,8 @@ class GearboxSmooth(Component):
                 def constr2(x, overallRatio):
                     return overallRatio-x[0]*x[1]*x[2]
 
-                x = fmin_cobyla(volume, x0, [constr1, constr2], consargs=[overallRatio], rhoend=1e-8, iprint=0)
+                stages = [lambda x: epicyclic_stage_volume(x, B_1, K_r1), lambda x: epicyclic_stage_volume(x, B_2, K_r2), parallel_stage_volume]
+                x = self.stageRatioMinimize(volume, x0, [constr1, constr2], overallRatio, stages)
 
             elif config == 'eep_3':
                 #fixes last stage ratio at 3
@@ -833,7 +849,8 @@ class GearboxSmooth(Component):
                 def constr4(x, overallRatio):
                     return 3.0-x[2]
 
-                x = fmin_cobyla(volume,  x0, [constr1, constr2, constr3, constr4], consargs=[overallRatio], rhoend=1e-8, iprint=0)
+                stages = [lambda x: epicyclic_stage_volume(x, B_1, K_r1), lambda x: epicyclic_stage_volume(x, B_2, K_r2), parallel_stage_volume]
+                x = self.stageRatioMinimize(volume, x0, [constr1, constr2, constr3, constr4], overallRatio, stages, {2: 3.0})
 
             elif config == 'eep_2':
                 #fixes final stage ratio at 2
@@ -852,7 +869,8 @@ class GearboxSmooth(Component):
                 def constr2(x, overallRatio):
                     return overallRatio-x[0]*x[1]*x[2]
 
-                x = fmin_cobyla(volume, x0, [constr1, constr2], consargs=[overallRatio], rhoend=1e-8, iprint=0)
+                stages = [lambda x: epicyclic_stage_volume(x, B_1, K_r1), lambda x: epicyclic_stage_volume(x, B_2, K_r2), parallel_stage_volume]
+                x = self.stageRatioMinimize(volume, x0, [constr1, constr2], overallRatio, stages)
 
             else:
                 x0=[overallRatio**(1.0/3.0), overallRatio**(1.0/3.0), overallRatio**(1.0/3.0)]
@@ -868,12 +886,24 @@ class GearboxSmooth(Component):
                 def constr2(x, overallRatio):
                     return overallRatio-x[0]*x[1]*x[2]
 
-                x = fmin_cobyla(volume, x0, [constr1, constr2], consargs=[overallRatio], rhoend=1e-8, iprint=0)
+                stages = [lambda x: epicyclic_stage_volume(x, B_1, K_r), parallel_stage_volume, parallel_stage_volume]
+                x = self.stageRatioMinimize(volume, x0, [constr1, constr2], overallRatio, stages)
+            cache_stage_ratios(key, x)
         else:
             x ='fail'
 
         return x
 
+    def stageRatioMinimize(self, volume, x0, constraints, overallRatio, stages, fixed=None):
+        '''
+        Minimizes the gearbox volume over the stage ratios from x0, with COBYLA or with newton steps on the volume terms of the stages (ratio_solver).
+        '''
+        if self.ratio_solver == 'newton':
+            solution = solve_stage_ratios(overallRatio, stages, x0, fixed)
+            if solution is not None:
+                return solution[0]
+        return fmin_cobyla(volume, x0, constraints, consargs=[overallRatio], rhoend=1e-8, iprint=0)
+
 
     def gbxWeightEst(self, config, overallRatio, Np, ratio_type, shaft_type, torque):
         '''
@@ -1025,7 +1055,6 @@ class LowSpeedShaftDrive4ptSmooth(Component):
         # counter = 0
         # N_count=100
         # N_count_2=2
-        len_pts=101
         D_max=1
         D_min=0.2
         sR = self.shaft_ratio
@@ -1077,11 +1106,6 @@ class LowSpeedShaftDrive4ptSmooth(Component):
         # carrierWeight = self.carrier_mass*g                       # carrier weight
         shrinkDiscWeight = self.shrink_disc_mass*g
 
-        #define LSS
-        x_ms = np.linspace(L_rb, L_ms+L_rb, len_pts)
-        x_rb = np.linspace(0.0, L_rb, len_pts)
-        # y_gp = np.linspace(0, L_gp, len_pts)
-
         # F_mb_x = -F_r_x - rotorWeight*sin(radians(gamma))
         F_mb_y = M_r_z/L_bg - F_r_y*(L_bg + L_rb)/L_bg
         F_mb_z = (-M_r_y + rotorWeight*(cos(radians(gamma))*(L_rb + L_bg)
@@ -1093,23 +1117,12 @@ class LowSpeedShaftDrive4ptSmooth(Component):
         # F_gb_y = -F_mb_y - F_r_y
         # F_gb_z = -F_mb_z + (shrinkDiscWeight+rotorWeight+gbxWeight + lssWeight)*cos(radians(gamma)) - F_r_z
 
-        My_ms = np.zeros(2*len_pts)
-        Mz_ms = np.zeros(2*len_pts)
-
-        for k in range(len_pts):
-            My_ms[k] = -M_r_y + rotorWeight*cos(radians(gamma))*x_rb[k] + 0.5*lssWeight/L_ms*x_rb[k]**2 - F_r_z*x_rb[k]
-            Mz_ms[k] = -M_r_z - F_r_y*x_rb[k]
-
-        for j in range(len_pts):
-            My_ms[j+len_pts] = -F_r_z*x_ms[j] - M_r_y + rotorWeight*cos(radians(gamma))*x_ms[j] - F_mb_z*(x_ms[j]-L_rb) + 0.5*lssWeight/L_ms*x_ms[j]**2
-            Mz_ms[j+len_pts] = -M_r_z - F_mb_y*(x_ms[j]-L_rb) -F_r_y*x_ms[j]
+        # exact moment extrema over the hub overhang and the main bearing to gearbox span
+        MM_max = max(beam_moment_max(0.0, L_rb, (-M_r_y, rotorWeight*cos(radians(gamma))-F_r_z, lssWeight/L_ms), (-M_r_z, -F_r_y, 0.)),
+                     beam_moment_max(L_rb, L_rb+L_ms, (-M_r_y, rotorWeight*cos(radians(gamma))-F_r_z, lssWeight/L_ms, [L_rb], [F_mb_z]), (-M_r_z, -F_r_y, 0., [L_rb], [F_mb_y])))
 
-        # x_shaft = np.concatenate([x_rb, x_ms])
-
-        MM_max=np.amax((My_ms**2+Mz_ms**2)**0.5)
-        # Index=np.argmax((My_ms**2+Mz_ms**2)**0.5)
-
-        MM_min = ((My_ms[-1]**2+Mz_ms[-1]**2)**0.5)
+        MM_min = ((beam_moment(L_rb+L_ms, -M_r_y, rotorWeight*cos(radians(gamma))-F_r_z, lssWeight/L_ms, [L_rb], [F_mb_z])**2
+                   + beam_moment(L_rb+L_ms, -M_r_z, -F_r_y, 0., [L_rb], [F_mb_y])**2)**0.5)
         #Design shaft OD
         MM=MM_max
         D_max=(16.0*n_safety/pi/Sy*(4.0*(MM*u_knm_inlb/1000)**2+3.0*(M_r_x*u_knm_inlb/1000)**2)**0.5)**(1.0/3.0)*u_in_m
@@ -1125,31 +1138,18 @@ class LowSpeedShaftDrive4ptSmooth(Component):
 
         lssWeight_new=((pi/3)*(D_max**2+D_min**2+D_max*D_min)*(L_ms)*density/4+(-pi/4*(D_in**2)*density*(L_ms)))*g
 
-        def deflection(F_r_z, W_r, gamma, M_r_y, f_mb_z, L_rb, W_ms, L_ms, z):
-            return -F_r_z*z**3/6.0 + W_r*cos(radians(gamma))*z**3/6.0 - M_r_y*z**2/2.0 - f_mb_z*(z-L_rb)**3/6.0 + W_ms/(L_ms + L_rb)/24.0*z**4
-
-
-        D1 = deflection(F_r_z, rotorWeight, gamma, M_r_y, F_mb_z, L_rb, lssWeight_new, L_ms, L_rb+L_ms)
-        D2 = deflection(F_r_z, rotorWeight, gamma, M_r_y, F_mb_z, L_rb, lssWeight_new, L_ms, L_rb)
-        C1 = -(D1-D2)/L_ms
-        C2 = D2-C1*(L_rb)
+        # shaft supported at main bearing and gearbox
+        [C1, C2] = beam_constants(L_rb, L_rb+L_ms, -M_r_y, rotorWeight*cos(radians(gamma))-F_r_z, lssWeight_new/(L_ms + L_rb), [L_rb], [F_mb_z])
 
         I_2=pi/64.0*(D_max**4 - D_in**4)
 
-        def gx(F_r_z, W_r, gamma, M_r_y, f_mb_z, L_rb, W_ms, L_ms, C1, z):
-            return -F_r_z*z**2/2.0 + W_r*cos(radians(gamma))*z**2/2.0 - M_r_y*z - f_mb_z*(z-L_rb)**2/2.0 + W_ms/(L_ms + L_rb)/6.0*z**3 + C1
-
-        theta_y = np.zeros(len_pts)
-        d_y = np.zeros(len_pts)
-
-        for kk in range(len_pts):
-            theta_y[kk]=gx(F_r_z, rotorWeight, gamma, M_r_y, F_mb_z, L_rb, lssWeight_new, L_ms, C1, x_ms[kk])/E/I_2
-            d_y[kk]=(deflection(F_r_z, rotorWeight, gamma, M_r_y, F_mb_z, L_rb, lssWeight_new, L_ms, x_ms[kk])+C1*x_ms[kk]+C2)/E/I_2
+        # slope at the gearbox
+        theta_y = beam_slope(L_rb+L_ms, -M_r_y, rotorWeight*cos(radians(gamma))-F_r_z, lssWeight_new/(L_ms + L_rb), [L_rb], [F_mb_z], C1)/E/I_2
 
         # check_limit = abs(abs(theta_y[-1])-TRB_limit/n_safety_brg)
 
-        self.sizing_constraints = np.array([theta_y[-1] - TRB_limit/n_safety_brg - tol,
-            -theta_y[-1] + TRB_limit/n_safety_brg - tol])
+        self.sizing_constraints = np.array([theta_y - TRB_limit/n_safety_brg - tol,
+            -theta_y + TRB_limit/n_safety_brg - tol])
 
         # if check_limit < 0:
         #     L_ms_new = L_ms + dL
@@ -1201,12 +1201,6 @@ class LowSpeedShaftDrive4ptSmooth(Component):
         #Weight
         lssWeight_new=((pi/3)*(D_max**2+D_min**2+D_max*D_min)*(L_ms_gb + L_mb)*density/4+(-pi/4*(D_in**2)*density*(L_ms_gb + L_mb)))*g
 
-        #define LSS
-        x_ms = np.linspace(L_rb + L_mb, L_ms_gb + L_mb +L_rb, len_pts)
-        x_mb = np.linspace(L_rb, L_mb+L_rb, len_pts)
-        x_rb = np.linspace(0.0, L_rb, len_pts)
-        # y_gp = np.linspace(0, L_gp, len_pts)
-
         # F_mb2_x = -F_r_x - rotorWeight*sin(radians(gamma))
         F_mb2_y = -M_r_z/L_mb + F_r_y*(L_rb)/L_mb
         F_mb2_z = (M_r_y - rotorWeight*cos(radians(gamma))*L_rb
@@ -1221,29 +1215,17 @@ class LowSpeedShaftDrive4ptSmooth(Component):
         # F_gb_y = -F_mb_y - F_r_y
         # F_gb_z = -F_mb_z + (shrinkDiscWeight+rotorWeight+gbxWeight + lssWeight)*cos(radians(gamma)) - F_r_z
 
-        My_ms = np.zeros(3*len_pts)
-        Mz_ms = np.zeros(3*len_pts)
+        # exact moment extrema over the hub overhang, the span between main bearings and the span to the gearbox
+        loads_y = (-M_r_y, rotorWeight*cos(radians(gamma))-F_r_z, lssWeight/L_ms)
+        MM_max = max(beam_moment_max(0.0, L_rb, loads_y, (-M_r_z, -F_r_y, 0.)),
+                     beam_moment_max(L_rb, L_rb+L_mb, loads_y+([L_rb], [F_mb1_z]), (-M_r_z, -F_r_y, 0., [L_rb], [F_mb1_y])),
+                     beam_moment_max(L_rb+L_mb, L_rb+L_mb+L_ms_gb, loads_y+([L_rb, L_rb+L_mb], [F_mb1_z, F_mb2_z]), (-M_r_z, -F_r_y, 0., [L_rb], [F_mb_y])))
 
-        for k in range(len_pts):
-            My_ms[k] = -M_r_y + rotorWeight*cos(radians(gamma))*x_rb[k] + 0.5*lssWeight/L_ms*x_rb[k]**2 - F_r_z*x_rb[k]
-            Mz_ms[k] = -M_r_z - F_r_y*x_rb[k]
+        MM_min = ((beam_moment(L_rb+L_mb+L_ms_gb, *loads_y+([L_rb, L_rb+L_mb], [F_mb1_z, F_mb2_z]))**2
+                   + beam_moment(L_rb+L_mb+L_ms_gb, -M_r_z, -F_r_y, 0., [L_rb], [F_mb_y])**2)**0.5)
 
-        for j in range(len_pts):
-            My_ms[j+len_pts] = -F_r_z*x_mb[j] - M_r_y + rotorWeight*cos(radians(gamma))*x_mb[j] - F_mb1_z*(x_mb[j]-L_rb) + 0.5*lssWeight/L_ms*x_mb[j]**2
-            Mz_ms[j+len_pts] = -M_r_z - F_mb1_y*(x_mb[j]-L_rb) -F_r_y*x_mb[j]
-
-        for l in range(len_pts):
-            My_ms[l + 2*len_pts] = -F_r_z*x_ms[l] - M_r_y + rotorWeight*cos(radians(gamma))*x_ms[l] - F_mb1_z*(x_ms[l]-L_rb) -F_mb2_z*(x_ms[l] - L_rb - L_mb) + 0.5*lssWeight/L_ms*x_ms[l]**2
-            Mz_ms[l + 2*len_pts] = -M_r_z - F_mb_y*(x_ms[l]-L_rb) -F_r_y*x_ms[l]
-
-        # x_shaft = np.concatenate([x_rb, x_mb, x_ms])
-
-        MM_max=np.amax((My_ms**2+Mz_ms**2)**0.5)
-        # Index=np.argmax((My_ms**2+Mz_ms**2)**0.5)
-
-        MM_min = ((My_ms[-1]**2+Mz_ms[-1]**2)**0.5)
-
-        MM_med = ((My_ms[-1 - len_pts]**2 + Mz_ms[-1 - len_pts]**2)**0.5)
+        MM_med = ((beam_moment(L_rb+L_mb, *loads_y+([L_rb], [F_mb1_z]))**2
+                   + beam_moment(L_rb+L_mb, -M_r_z, -F_r_y, 0., [L_rb], [F_mb1_y])**2)**0.5)
 
         #Design Shaft OD using static loading and distortion energy theory
         MM=MM_max
@@ -1264,47 +1246,17 @@ class LowSpeedShaftDrive4ptSmooth(Component):
 
         lssWeight_new = (density*pi/12.0*L_mb*(D_max**2+D_med**2 + D_max*D_med) - density*pi/4.0*D_in**2*L_mb)*g
 
-        #deflection between mb1 and mb2
-        def deflection1(F_r_z, W_r, gamma, M_r_y, f_mb1_z, L_rb, W_ms, L_ms, L_mb, z):
-            return -F_r_z*z**3/6.0 + W_r*cos(radians(gamma))*z**3/6.0 - M_r_y*z**2/2.0 - f_mb1_z*(z-L_rb)**3/6.0 + W_ms/(L_ms + L_mb)/24.0*z**4
-
-        D11 = deflection1(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, L_rb, lssWeight_new, L_ms, L_mb, L_rb+L_mb)
-        D21 = deflection1(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, L_rb, lssWeight_new, L_ms, L_mb, L_rb)
-        C11 = -(D11-D21)/L_mb
-        C21 = -D21-C11*(L_rb)
+        # shaft supported at both main bearings
+        [C11, C21] = beam_constants(L_rb, L_rb+L_mb, -M_r_y, rotorWeight*cos(radians(gamma))-F_r_z, lssWeight_new/(L_ms + L_mb), [L_rb], [F_mb1_z])
 
         I_2=pi/64.0*(D_max**4 - D_in**4)
 
-        def gx1(F_r_z, W_r, gamma, M_r_y, f_mb1_z, L_rb, W_ms, L_ms, L_mb, C11, z):
-            return -F_r_z*z**2/2.0 + W_r*cos(radians(gamma))*z**2/2.0 - M_r_y*z - f_mb1_z*(z - L_rb)**2/2.0 + W_ms/(L_ms + L_mb)/6.0*z**3 + C11
-
-        theta_y = np.zeros(2*len_pts)
-        d_y = np.zeros(2*len_pts)
-
-        for kk in range(len_pts):
-            theta_y[kk]=gx1(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, L_rb, lssWeight_new, L_ms, L_mb, C11, x_mb[kk])/E/I_2
-            d_y[kk]=(deflection1(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, L_rb, lssWeight_new, L_ms, L_mb, x_mb[kk])+C11*x_mb[kk]+C21)/E/I_2
-
-
-        #Deflection between mb2 and gbx
-        def deflection2(F_r_z, W_r, gamma, M_r_y, f_mb1_z, f_mb2_z, L_rb, W_ms, L_ms, L_mb, z):
-            return -F_r_z*z**3/6.0 + W_r*cos(radians(gamma))*z**3/6.0 - M_r_y*z**2/2.0 - f_mb1_z*(z-L_rb)**3/6.0 + -f_mb2_z*(z - L_rb - L_mb)**3/6.0 + W_ms/(L_ms + L_mb)/24.0*z**4
-
-        def gx2(F_r_z, W_r, gamma, M_r_y, f_mb1_z, f_mb2_z, L_rb, W_ms, L_ms, L_mb, z):
-            return -F_r_z*z**2/2.0 + W_r*cos(radians(gamma))*z**2/2.0 - M_r_y*z - f_mb1_z*(z - L_rb)**2/2.0 - f_mb2_z*(z - L_rb - L_mb)**2/2.0 + W_ms/(L_ms + L_mb)/6.0*z**3
-
-        D12 = deflection2(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, F_mb2_z, L_rb, lssWeight_new, L_ms, L_mb, L_rb+L_mb)
-        D22 = gx2(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, F_mb2_z, L_rb, lssWeight_new, L_ms, L_mb, L_rb+L_mb)
-        C12 = gx1(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, L_rb, lssWeight_new, L_ms, L_mb, C11, x_mb[-1])-D22
-        C22 = -D12-C12*(L_rb + L_mb)
-
-        for kk in range(len_pts):
-            theta_y[kk + len_pts]=(gx2(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, F_mb2_z, L_rb, lssWeight_new, L_ms, L_mb, x_ms[kk]) + C12)/E/I_2
-            d_y[kk + len_pts]=(deflection2(F_r_z, rotorWeight, gamma, M_r_y, F_mb1_z, F_mb2_z, L_rb, lssWeight_new, L_ms, L_mb, x_ms[kk])+C12*x_ms[kk]+C22)/E/I_2
+        # slope at the shaft end, downwind of the second main bearing
+        theta_y = beam_slope(L_rb+L_mb+L_ms_gb, -M_r_y, rotorWeight*cos(radians(gamma))-F_r_z, lssWeight_new/(L_ms + L_mb), [L_rb, L_rb+L_mb], [F_mb1_z, F_mb2_z], C11)/E/I_2
 
         self.sizing_constraints = np.concatenate([self.sizing_constraints,
-            [theta_y[-1] - TRB_limit/n_safety_brg - tol,
-            -theta_y[-1] + TRB_limit/n_safety_brg - tol]])
+            [theta_y - TRB_limit/n_safety_brg - tol,
+            -theta_y + TRB_limit/n_safety_brg - tol]])
 
         self.sizing_constraints /= TRB_limit  # for normalization
 
@@ -1355,6 +1307,41 @@ class LowSpeedShaftDrive4ptSmooth(Component):
 
 
 
+# bearing splines: knot data per bearing type, splines are built on first use and shared
+# TODO: TRB bearing type
+
+bearing_mass_d_pt = [0.0, 0.1, 0.2, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.85, 0.95, 1.05, 1.15, 1.2, 1.3, 1.4]
+bearing_mass_pt = {'CARB': [120.0, 120.0, 120.0, 120.0, 145.0, 225.0, 390.0, 645.0, 860.0, 1200.0, 1570.0, 2000.0, 2740.0, 2740.0, 2740.0, 2740.0],
+                   'SRB': [128.7, 128.7, 128.7, 128.7, 220.0, 440.0, 715.0, 1200.0, 1600.0, 2000.0, 2350.0, 2700.0, 2960.0, 2960.0, 2960.0, 2960.0]}
+
+bearing_resize_d_pt = [0.0, 0.05, 0.15, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.9, 0.95, 1.1, 1.2, 1.3, 1.4]
+# CARB: fwpt = [0.2, 0.2, 0.2, 0.2, 0.2, 0.325, 0.375, 0.345, 0.375, 0.3, 0.375, 0.45, 0.45, 0.45, 0.45]
+# SRB: dapt = [0.3, 0.3, 0.3, 0.3, 0.4, 0.5, 0.6, 0.75, 0.8, 0.95, 1, 1.25, 1.25, 1.25, 1.25]
+#      fwpt = [0.2, 0.2, 0.2, 0.2, 0.25, 0.325, 0.375, 0.44, 0.475, 0.525, 0.5, 0.5, 0.5, 0.5, 0.5]
+bearing_da_pt = {'CARB': [0.3, 0.3, 0.3, 0.3, 0.4, 0.5, 0.6, 0.71, 0.8, 0.95, 1.0, 1.25, 1.25, 1.25, 1.25],
+                 'SRB': [0.3, 0.3, 0.3, 0.3, 0.4, 0.5, 0.6, 0.71, 0.8, 0.95, 1, 1.25, 1.25, 1.25, 1.25]}
+bearing_fw_pt = {'CARB': [0.2, 0.2, 0.2, 0.2, 0.2, 0.325, 0.375, 0.375, 0.375, 0.375, 0.375, 0.45, 0.45, 0.45, 0.45],
+                 'SRB': [0.2, 0.2, 0.2, 0.2, 0.25, 0.325, 0.375, 0.44, 0.475, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5]}
+
+_bearing_splines = {}
+
+def bearing_mass_spline(mbtype):
+    # Akima spline of bearing mass (without housing) over shaft diameter
+
+    if ('mass', mbtype) not in _bearing_splines:
+        _bearing_splines[('mass', mbtype)] = Akima(bearing_mass_d_pt, bearing_mass_pt[mbtype], delta_x=0.0)
+
+    return _bearing_splines[('mass', mbtype)]
+
+def bearing_resize_splines(mbtype):
+    # Akima splines of bearing bore diameter and facewidth over shaft diameter
+
+    if ('resize', mbtype) not in _bearing_splines:
+        _bearing_splines[('resize', mbtype)] = (Akima(bearing_resize_d_pt, bearing_da_pt[mbtype], delta_x=0.0),
+                                                Akima(bearing_resize_d_pt, bearing_fw_pt[mbtype], delta_x=0.0))
+
+    return _bearing_splines[('resize', mbtype)]
+
 def resize_for_bearings(D_mb, mbtype):
     # Internal function to resize shaft for bearings - for Yi to add content (using lookup table etc)
     # To add bearing load capacity check later
@@ -1364,25 +1351,32 @@ def resize_for_bearings(D_mb, mbtype):
       FW_mb2=0.5
     '''
 
-    d_pt = [0.0, 0.05, 0.15, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.9, 0.95, 1.1, 1.2, 1.3, 1.4]
+    D_mb_a, ddmba_ddmb, FW_mb, dfwmb_ddmb = resize_for_bearings_deriv(D_mb, mbtype)
 
-    if mbtype == 'CARB':
-        da_pt = [0.3, 0.3, 0.3, 0.3, 0.4, 0.5, 0.6, 0.71, 0.8, 0.95, 1.0, 1.25, 1.25, 1.25, 1.25]
-        # fwpt = [0.2, 0.2, 0.2, 0.2, 0.2, 0.325, 0.375, 0.345, 0.375, 0.3, 0.375, 0.45, 0.45, 0.45, 0.45]
-        fw_pt = [0.2, 0.2, 0.2, 0.2, 0.2, 0.325, 0.375, 0.375, 0.375, 0.375, 0.375, 0.45, 0.45, 0.45, 0.45]
+    return D_mb_a, FW_mb
 
-    elif mbtype == 'SRB':
+def resize_for_bearings_deriv(D_mb, mbtype):
+    '''
+    Bearing bore diameter and facewidth for a shaft diameter or an array of shaft diameters,
+    with their derivatives with respect to shaft diameter.
 
-        # dapt = [0.3, 0.3, 0.3, 0.3, 0.4, 0.5, 0.6, 0.75, 0.8, 0.95, 1, 1.25, 1.25, 1.25, 1.25]
-        da_pt = [0.3, 0.3, 0.3, 0.3, 0.4, 0.5, 0.6, 0.71, 0.8, 0.95, 1, 1.25, 1.25, 1.25, 1.25]
-        # fwpt = [0.2, 0.2, 0.2, 0.2, 0.25, 0.325, 0.375, 0.44, 0.475, 0.525, 0.5, 0.5, 0.5, 0.5, 0.5]
-        fw_pt = [0.2, 0.2, 0.2, 0.2, 0.25, 0.325, 0.375, 0.44, 0.475, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5]
+    Returns
+    -------
+    D_mb_a, dD_mb_a/dD_mb, FW_mb, dFW_mb/dD_mb
+    '''
 
-    da_spline = Akima(d_pt, da_pt, delta_x=0.0)
+    da_spline, fw_spline = bearing_resize_splines(mbtype)
     D_mb_a, ddmba_ddmb = da_spline.interp(D_mb)
-
-    fw_spline = Akima(d_pt, fw_pt, delta_x=0.0)
     FW_mb, dfwmb_ddmb = fw_spline.interp(D_mb)
 
-    return D_mb_a, FW_mb
+    return D_mb_a, ddmba_ddmb, FW_mb, dfwmb_ddmb
+
+def bearing_mass_deriv(D_mb, mbtype):
+    '''
+    Bearing mass including housing for a shaft diameter or an array of shaft diameters,
+    with its derivative with respect to shaft diameter.
+    '''
+
+    mass, dmass_dd = bearing_mass_spline(mbtype).interp(D_mb)
 
+    return mass*(1 + 8000.0/2700.0), dmass_dd*(1 + 8000.0/2700.0)
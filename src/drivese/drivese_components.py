@@ -16,7 +16,12 @@ import scipy as scp
 import scipy.optimize as opt
 from scipy import integrate
 
-from drivese_utils import seed_bearing_table, fatigue_for_bearings, fatigue2_for_bearings, resize_for_bearings, get_rotor_mass, get_L_rb
+from drivese_utils import seed_bearing_table, fatigue_for_bearings, fatigue2_for_bearings, resize_for_bearings, get_rotor_mass, get_L_rb, \
+    shaft_sn_curve, ds472_load_spectrum, ds472_shaft_damage, load_range_damage, equivalent_bearing_load, equivalent_bearing_load2, bearing_life, length_search_step, \
+    fatigue_diameter, shaft_range_damage, batch_length_search_step, batch_resize_for_bearings, cached_stage_ratios, cache_stage_ratios, \
+    stage_ratio_table, interpolate_stage_ratios, stage_ratio_error_bound, epicyclic_stage_volume, parallel_stage_volume, solve_stage_ratios, section_scale, \
+    i_section, get_section_catalog, lightest_section_index
+from shaft_beam import beam_moment, beam_slope, beam_deflection, beam_constants, beam_moment_max, workspace_array
 
 
 #-------------------------------------------------------------------------------
@@ -56,6 +61,11 @@ class LowSpeedShaft_drive4pt(Component):
 
     L_rb = Float(iotype='in', units='m', desc='distance between hub center and upwind main bearing')
     check_fatigue = Int(iotype = 'in', desc = 'turns on and off fatigue check')
+    bearing_selection = Enum('bore', ('bore','mass'), iotype='in', desc='main bearing selection from catalog: smallest bore or lightest bearing meeting bore and load rating')
+    length_search = Enum('root', ('root','step'), iotype='in', desc='search of shaft lengths on the bearing slope limit: bracketed root solve or fixed length steps')
+    fatigue_tol = Float(0.01, iotype='in', units='m', desc='diameter resolution of the fatigue check')
+    shaft_profiles = Bool(False, iotype='in', desc='also output moment, slope and deflection profiles of the statically sized shaft')
+    warm_start = Bool(False, iotype='in', desc='start the root search of shaft lengths next to the last shaft sized by this component, falling back to a cold start')
     fatigue_exponent = Float(0,iotype = 'in', desc = 'fatigue exponent of material')
     S_ut = Float(iotype = 'in', units = 'Pa', desc = 'ultimate tensile strength of material')
     weibull_A = Float(iotype = 'in', units = 'm/s', desc = 'weibull scale parameter "A" of 10-minute windspeed probability distribution')
@@ -82,6 +92,14 @@ class LowSpeedShaft_drive4pt(Component):
     rotor_My_count = Array(iotype='in', desc = 'corresponding cycle array for My distribution') 
     rotor_Mz_distribution = Array(iotype='in', units ='N*m', desc = 'Mz distribution across turbine life')
     rotor_Mz_count = Array(iotype='in', desc = 'corresponding cycle array for Mz distribution') 
+
+    # fatigue analysis of a given shaft
+    analysis_only = Bool(False, iotype='in', desc='evaluate fatigue damage and bearing life of the given shaft geometry (D_mb1, D_mb2, L_mb) instead of sizing the shaft')
+    D_mb1 = Float(iotype='in', units='m', desc='given lss outer diameter at main bearing')
+    D_mb2 = Float(iotype='in', units='m', desc='given lss outer diameter at second bearing')
+    L_mb = Float(iotype='in', units='m', desc='given distance between main bearings')
+    C_mb1 = Float(0.0, iotype='in', units='kN', desc='dynamic load rating of main bearing, zero for the catalog bearing fitting D_mb1')
+    C_mb2 = Float(0.0, iotype='in', units='kN', desc='dynamic load rating of second bearing, zero for the catalog bearing fitting D_mb2')
     
     # outputs
     design_torque = Float(iotype='out', units='N*m', desc='lss design torque')
@@ -98,14 +116,29 @@ class LowSpeedShaft_drive4pt(Component):
     bearing_mass2 = Float(iotype='out', units = 'kg', desc='second bearing mass')
     bearing_location1 = Array(np.array([0,0,0]),iotype='out', units = 'm', desc = 'main bearing 1 center of mass')
     bearing_location2 = Array(np.array([0,0,0]),iotype='out', units = 'm', desc = 'main bearing 2 center of mass')
+    damage_mb1 = Float(iotype='out', desc='Palmgren-Miner damage of lss at main bearing (analysis_only)')
+    damage_mb2 = Float(iotype='out', desc='Palmgren-Miner damage of lss at second bearing (analysis_only)')
+    L10_mb1 = Float(iotype='out', desc='basic rating life of main bearing in rotations (analysis_only)')
+    L10_mb2 = Float(iotype='out', desc='basic rating life of second bearing in rotations (analysis_only)')
+    shaft_x = Array(iotype='out', units='m', desc='distances from hub center, main bearing to shaft end, of the shaft profiles (shaft_profiles)')
+    shaft_moment = Array(iotype='out', units='N*m', desc='resultant bending moment along the shaft (shaft_profiles)')
+    shaft_slope = Array(iotype='out', units='rad', desc='slope of the shaft in the x-z plane (shaft_profiles)')
+    shaft_deflection = Array(iotype='out', units='m', desc='deflection of the shaft in the x-z plane (shaft_profiles)')
 
     def __init__(self):
         '''
         '''
 
         super(LowSpeedShaft_drive4pt, self).__init__()
+
+        self._converged = {} #last statically sized shaft, for warm starts
+        self._workspace = {} #buffers filled in place by the sizing passes
     
     def execute(self):
+        if self.analysis_only:
+            self.fatigue_analysis()
+            return
+
         #Hub Forces
         F_r_x = self.rotor_force_x            #External F_x
         F_r_y = self.rotor_force_y                 #External F_y
@@ -186,7 +219,17 @@ class LowSpeedShaft_drive4pt(Component):
 
         length_max = self.overhang - L_rb + (self.gearbox_cm[0] -self.gearbox_length/2.) #modified length limit 7/29
 
-        while abs(check_limit) > tol and L_ms_new < length_max:
+        #warm start just short of the last converged length
+        sign = 0.0
+        warm = self.warm_start and self.length_search == 'root' and 'L_ms' in self._converged \
+               and max(L_ms_0, self._converged['L_ms'][0] - dL) < length_max
+        if warm:
+            [L_ms_new,D_max,D_min,sign] = self._converged['L_ms']
+            L_ms_new = max(L_ms_0, L_ms_new - dL)
+
+        searching = abs(check_limit) > tol and L_ms_new < length_max
+        bracket = []
+        while searching:
             counter = counter+1
             if L_ms_new > 0:
                 L_ms=L_ms_new
@@ -206,11 +249,6 @@ class LowSpeedShaft_drive4pt(Component):
             carrierWeight = self.carrier_mass*g                       #carrier weight
             shrinkDiscWeight = self.shrink_disc_mass*g
 
-            #define LSS
-            x_ms = np.linspace(L_rb, L_ms+L_rb, len_pts)
-            x_rb = np.linspace(0.0, L_rb, len_pts)
-            y_gp = np.linspace(0, L_gp, len_pts)
-
             F_mb_x = -F_r_x - rotorWeight*sin(radians(gamma))
             F_mb_y = +M_r_z/L_bg - F_r_y*(L_bg + L_rb)/L_bg
             F_mb_z = (-M_r_y + rotorWeight*(cos(radians(gamma))*(L_rb + L_bg)\
@@ -222,23 +260,12 @@ class LowSpeedShaft_drive4pt(Component):
             F_gb_y = -F_mb_y - F_r_y
             F_gb_z = -F_mb_z + (shrinkDiscWeight+rotorWeight+gbxWeight + lssWeight)*cos(radians(gamma)) - F_r_z
 
-            My_ms = np.zeros(2*len_pts)
-            Mz_ms = np.zeros(2*len_pts)
-
-            for k in range(len_pts):
-                My_ms[k] = -M_r_y + rotorWeight*cos(radians(gamma))*x_rb[k] + 0.5*lssWeight/L_ms*x_rb[k]**2 - F_r_z*x_rb[k]
-                Mz_ms[k] = -M_r_z - F_r_y*x_rb[k]
-
-            for j in range(len_pts):
-                My_ms[j+len_pts] = -F_r_z*x_ms[j] - M_r_y + rotorWeight*cos(radians(gamma))*x_ms[j] - F_mb_z*(x_ms[j]-L_rb) + 0.5*lssWeight/L_ms*x_ms[j]**2
-                Mz_ms[j+len_pts] = -M_r_z - F_mb_y*(x_ms[j]-L_rb) -F_r_y*x_ms[j]
-
-            x_shaft = np.concatenate([x_rb, x_ms])
-
-            MM_max=np.amax((My_ms**2+Mz_ms**2)**0.5)
-            Index=np.argmax((My_ms**2+Mz_ms**2)**0.5)
+            #exact moment extrema over the hub overhang and the main bearing to gearbox span
+            MM_max = max(beam_moment_max(0.0,L_rb,(-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight/L_ms),(-M_r_z,-F_r_y,0.),self._workspace),
+                         beam_moment_max(L_rb,L_rb+L_ms,(-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight/L_ms,[L_rb],[F_mb_z]),(-M_r_z,-F_r_y,0.,[L_rb],[F_mb_y]),self._workspace))
 
-            MM_min = ((My_ms[-1]**2+Mz_ms[-1]**2)**0.5)
+            MM_min = ((beam_moment(L_rb+L_ms,-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight/L_ms,[L_rb],[F_mb_z])**2 \
+                      + beam_moment(L_rb+L_ms,-M_r_z,-F_r_y,0.,[L_rb],[F_mb_y])**2)**0.5)
             #Design shaft OD 
             MM=MM_max
             D_max=(16.0*n_safety/pi/Sy*(4.0*(MM*u_knm_inlb/1000)**2+3.0*(M_r_x*u_knm_inlb/1000)**2)**0.5)**(1.0/3.0)*u_in_m
@@ -254,34 +281,36 @@ class LowSpeedShaft_drive4pt(Component):
            
             lssWeight_new=((pi/3)*(D_max**2+D_min**2+D_max*D_min)*(L_ms)*density/4+(-pi/4*(D_in**2)*density*(L_ms)))*g
 
-            def deflection(F_r_z,W_r,gamma,M_r_y,f_mb_z,L_rb,W_ms,L_ms,z):
-                return -F_r_z*z**3/6.0 + W_r*cos(radians(gamma))*z**3/6.0 - M_r_y*z**2/2.0 - f_mb_z*(z-L_rb)**3/6.0 + W_ms/(L_ms + L_rb)/24.0*z**4
-            
-                     
-            D1 = deflection(F_r_z,rotorWeight,gamma,M_r_y,F_mb_z,L_rb,lssWeight_new,L_ms,L_rb+L_ms)
-            D2 = deflection(F_r_z,rotorWeight,gamma,M_r_y,F_mb_z,L_rb,lssWeight_new,L_ms,L_rb)
-            C1 = -(D1-D2)/L_ms;
-            C2 = D2-C1*(L_rb);
+            #shaft supported at main bearing and gearbox
+            [C1,C2] = beam_constants(L_rb,L_rb+L_ms,-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight_new/(L_ms + L_rb),[L_rb],[F_mb_z])
             
             I_2=pi/64.0*(D_max**4 - D_in**4)
 
-            def gx(F_r_z,W_r,gamma,M_r_y,f_mb_z,L_rb,W_ms,L_ms,C1,z):
-                return -F_r_z*z**2/2.0 + W_r*cos(radians(gamma))*z**2/2.0 - M_r_y*z - f_mb_z*(z-L_rb)**2/2.0 + W_ms/(L_ms + L_rb)/6.0*z**3 + C1
-
-            theta_y = np.zeros(len_pts)
-            d_y = np.zeros(len_pts)
-
-            for kk in range(len_pts):
-                theta_y[kk]=gx(F_r_z,rotorWeight,gamma,M_r_y,F_mb_z,L_rb,lssWeight_new,L_ms,C1,x_ms[kk])/E/I_2
-                d_y[kk]=(deflection(F_r_z,rotorWeight,gamma,M_r_y,F_mb_z,L_rb,lssWeight_new,L_ms,x_ms[kk])+C1*x_ms[kk]+C2)/E/I_2
-
-            check_limit = abs(abs(theta_y[-1])-TRB1_limit/n_safety_brg)
+            #slope at the gearbox
+            theta_y = beam_slope(L_rb+L_ms,-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight_new/(L_ms + L_rb),[L_rb],[F_mb_z],C1)/E/I_2
+
+            check_limit = abs(abs(theta_y)-TRB1_limit/n_safety_brg)
+
+            if self.length_search == 'root':
+                residual = abs(theta_y)-TRB1_limit/n_safety_brg
+                if warm and len(bracket) == 0 and np.sign(residual - tol*sign) != sign:
+                    #the limit is reached short of the warm start, start over cold
+                    warm = False
+                    [L_ms_new,D_max,D_min] = [0.0,1,0.2]
+                    continue
+                if len(bracket) == 0:
+                    [L_first,sign] = [L_ms,np.sign(residual)]
+                [L_ms_new, searching] = length_search_step(L_ms, residual, bracket, length_max, tol, L_far=L_first + 2*dL if warm else None)
+            else:
+                if check_limit < 0:
+                    L_ms_new = L_ms + dL
 
-            if check_limit < 0:
-                L_ms_new = L_ms + dL
+                else:
+                    L_ms_new = L_ms + dL
+                searching = abs(check_limit) > tol and L_ms_new < length_max
 
-            else:
-                L_ms_new = L_ms + dL
+        if self.length_search == 'root':
+            self._converged['L_ms'] = [L_ms_new,D_max,D_min,sign]
 
          #Initialization
         L_mb=L_ms_new
@@ -292,8 +321,19 @@ class LowSpeedShaft_drive4pt(Component):
         L_ms = L_ms_new
         dL_ms = 0.05
         dL = 0.0025
-
-        while abs(check_limit_ms)>tol and L_mb_new < length_max:
+        if self.length_search == 'root':
+            N_count_2 = 1 #L_ms_gb is not updated, a second pass repeats the first
+
+        sign = 0.0
+        warm = self.warm_start and self.length_search == 'root' and 'L_mb' in self._converged \
+               and max(L_mb_0, self._converged['L_mb'][0] - dL_ms) < length_max
+        if warm:
+            [L_mb_new,sign] = self._converged['L_mb']
+            L_mb_new = max(L_mb_0, L_mb_new - dL_ms)
+
+        searching = abs(check_limit_ms)>tol and L_mb_new < length_max
+        bracket = []
+        while searching:
             counter_ms= counter_ms + 1
             if L_mb_new > 0:
                 L_mb=L_mb_new
@@ -322,12 +362,6 @@ class LowSpeedShaft_drive4pt(Component):
                 #Weight
                 lssWeight_new=((pi/3)*(D_max**2+D_min**2+D_max*D_min)*(L_ms_gb + L_mb)*density/4+(-pi/4*(D_in**2)*density*(L_ms_gb + L_mb)))*g
 
-                #define LSS
-                x_ms = np.linspace(L_rb + L_mb, L_ms_gb + L_mb +L_rb, len_pts)
-                x_mb = np.linspace(L_rb, L_mb+L_rb, len_pts)
-                x_rb = np.linspace(0.0, L_rb, len_pts)
-                y_gp = np.linspace(0, L_gp, len_pts)
-
                 F_mb2_x = -F_r_x - rotorWeight*sin(radians(gamma))
                 F_mb2_y = -M_r_z/L_mb + F_r_y*(L_rb)/L_mb
                 F_mb2_z = (M_r_y - rotorWeight*cos(radians(gamma))*L_rb \
@@ -342,29 +376,17 @@ class LowSpeedShaft_drive4pt(Component):
                 F_gb_y = -F_mb_y - F_r_y
                 F_gb_z = -F_mb_z + (shrinkDiscWeight+rotorWeight+gbxWeight + lssWeight)*cos(radians(gamma)) - F_r_z
 
-                My_ms = np.zeros(3*len_pts)
-                Mz_ms = np.zeros(3*len_pts)
-
-                for k in range(len_pts):
-                    My_ms[k] = -M_r_y + rotorWeight*cos(radians(gamma))*x_rb[k] + 0.5*lssWeight/(L_mb+L_ms_0)*x_rb[k]**2 - F_r_z*x_rb[k]
-                    Mz_ms[k] = -M_r_z - F_r_y*x_rb[k]
-
-                for j in range(len_pts):
-                    My_ms[j+len_pts] = -F_r_z*x_mb[j] - M_r_y + rotorWeight*cos(radians(gamma))*x_mb[j] - F_mb1_z*(x_mb[j]-L_rb) + 0.5*lssWeight/(L_mb+L_ms_0)*x_mb[j]**2
-                    Mz_ms[j+len_pts] = -M_r_z - F_mb1_y*(x_mb[j]-L_rb) -F_r_y*x_mb[j]
-
-                for l in range(len_pts):
-                    My_ms[l + 2*len_pts] = -F_r_z*x_ms[l] - M_r_y + rotorWeight*cos(radians(gamma))*x_ms[l] - F_mb1_z*(x_ms[l]-L_rb) -F_mb2_z*(x_ms[l] - L_rb - L_mb) + 0.5*lssWeight/(L_mb+L_ms_0)*x_ms[l]**2
-                    Mz_ms[l + 2*len_pts] = -M_r_z - F_mb_y*(x_ms[l]-L_rb) -F_r_y*x_ms[l]
-
-                x_shaft = np.concatenate([x_rb, x_mb, x_ms])
+                #exact moment extrema over the hub overhang, the span between main bearings and the span to the gearbox
+                loads_y = (-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight/(L_mb+L_ms_0))
+                MM_max = max(beam_moment_max(0.0,L_rb,loads_y,(-M_r_z,-F_r_y,0.),self._workspace),
+                             beam_moment_max(L_rb,L_rb+L_mb,loads_y+([L_rb],[F_mb1_z]),(-M_r_z,-F_r_y,0.,[L_rb],[F_mb1_y]),self._workspace),
+                             beam_moment_max(L_rb+L_mb,L_rb+L_mb+L_ms_gb,loads_y+([L_rb,L_rb+L_mb],[F_mb1_z,F_mb2_z]),(-M_r_z,-F_r_y,0.,[L_rb],[F_mb_y]),self._workspace))
 
-                MM_max=np.amax((My_ms**2+Mz_ms**2)**0.5)
-                Index=np.argmax((My_ms**2+Mz_ms**2)**0.5)
+                MM_min = ((beam_moment(L_rb+L_mb+L_ms_gb,*loads_y+([L_rb,L_rb+L_mb],[F_mb1_z,F_mb2_z]))**2 \
+                          + beam_moment(L_rb+L_mb+L_ms_gb,-M_r_z,-F_r_y,0.,[L_rb],[F_mb_y])**2)**0.5)
 
-                MM_min = ((My_ms[-1]**2+Mz_ms[-1]**2)**0.5)
-
-                MM_med = ((My_ms[-1 - len_pts]**2 + Mz_ms[-1 - len_pts]**2)**0.5)
+                MM_med = ((beam_moment(L_rb+L_mb,*loads_y+([L_rb],[F_mb1_z]))**2 \
+                          + beam_moment(L_rb+L_mb,-M_r_z,-F_r_y,0.,[L_rb],[F_mb1_y])**2)**0.5)
 
                 #Design Shaft OD using static loading and distortion energy theory
                 MM=MM_max
@@ -385,56 +407,56 @@ class LowSpeedShaft_drive4pt(Component):
 
                 lssWeight_new = (density*pi/12.0*L_mb*(D_max**2+D_med**2 + D_max*D_med) - density*pi/4.0*D_in**2*L_mb)*g
 
-                #deflection between mb1 and mb2
-                def deflection1(F_r_z,W_r,gamma,M_r_y,f_mb1_z,L_rb,W_ms,L_ms,L_mb,z):
-                    return -F_r_z*z**3/6.0 + W_r*cos(radians(gamma))*z**3/6.0 - M_r_y*z**2/2.0 - f_mb1_z*(z-L_rb)**3/6.0 + W_ms/(L_ms + L_mb)/24.0*z**4
-                
-                D11 = deflection1(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,L_rb,lssWeight_new,L_ms,L_mb,L_rb+L_mb)
-                D21 = deflection1(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,L_rb,lssWeight_new,L_ms,L_mb,L_rb)
-                C11 = -(D11-D21)/L_mb
-                C21 = -D21-C11*(L_rb)
+                #shaft supported at both main bearings
+                [C11,C21] = beam_constants(L_rb,L_rb+L_mb,-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight_new/(L_ms + L_mb),[L_rb],[F_mb1_z])
 
                 I_2=pi/64.0*(D_max**4 - D_in**4)
 
-                def gx1(F_r_z,W_r,gamma,M_r_y,f_mb1_z,L_rb,W_ms,L_ms,L_mb,C11,z):
-                    return -F_r_z*z**2/2.0 + W_r*cos(radians(gamma))*z**2/2.0 - M_r_y*z - f_mb1_z*(z - L_rb)**2/2.0 + W_ms/(L_ms + L_mb)/6.0*z**3 + C11
-
-                theta_y = np.zeros(2*len_pts)
-                d_y = np.zeros(2*len_pts)
-
-                for kk in range(len_pts):
-                    theta_y[kk]=gx1(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,L_rb,lssWeight_new,L_ms,L_mb,C11,x_mb[kk])/E/I_2
-                    d_y[kk]=(deflection1(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,L_rb,lssWeight_new,L_ms,L_mb,x_mb[kk])+C11*x_mb[kk]+C21)/E/I_2
+                #slope at the shaft end, downwind of the second main bearing
+                theta_y = beam_slope(L_rb+L_mb+L_ms_gb,-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight_new/(L_ms + L_mb),[L_rb,L_rb+L_mb],[F_mb1_z,F_mb2_z],C11)/E/I_2
 
-                #Deflection between mb2 and gbx
-                def deflection2(F_r_z,W_r,gamma,M_r_y,f_mb1_z,f_mb2_z,L_rb,W_ms,L_ms,L_mb,z):
-                    return -F_r_z*z**3/6.0 + W_r*cos(radians(gamma))*z**3/6.0 - M_r_y*z**2/2.0 - f_mb1_z*(z-L_rb)**3/6.0 + -f_mb2_z*(z - L_rb - L_mb)**3/6.0 + W_ms/(L_ms + L_mb)/24.0*z**4
-            
-                def gx2(F_r_z,W_r,gamma,M_r_y,f_mb1_z,f_mb2_z,L_rb,W_ms,L_ms,L_mb,z):
-                    return -F_r_z*z**2/2.0 + W_r*cos(radians(gamma))*z**2/2.0 - M_r_y*z - f_mb1_z*(z - L_rb)**2/2.0 - f_mb2_z*(z - L_rb - L_mb)**2/2.0 + W_ms/(L_ms + L_mb)/6.0*z**3
-
-                D12 = deflection2(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,F_mb2_z,L_rb,lssWeight_new,L_ms,L_mb,L_rb+L_mb)
-                D22 = gx2(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,F_mb2_z,L_rb,lssWeight_new,L_ms,L_mb,L_rb+L_mb)
-                C12 = gx1(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,L_rb,lssWeight_new,L_ms,L_mb,C11,x_mb[-1])-D22
-                C22 = -D12-C12*(L_rb + L_mb);
-
-                for kk in range(len_pts):
-                    theta_y[kk + len_pts]=(gx2(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,F_mb2_z,L_rb,lssWeight_new,L_ms,L_mb,x_ms[kk]) + C12)/E/I_2
-                    d_y[kk + len_pts]=(deflection2(F_r_z,rotorWeight,gamma,M_r_y,F_mb1_z,F_mb2_z,L_rb,lssWeight_new,L_ms,L_mb,x_ms[kk])+C12*x_ms[kk]+C22)/E/I_2
-
-                check_limit = abs(abs(theta_y[-1])-TRB1_limit/n_safety_brg)
+                check_limit = abs(abs(theta_y)-TRB1_limit/n_safety_brg)
 
                 if check_limit < 0:
                     L_ms__gb_new = L_ms_gb + dL
                 else:
                     L_ms__gb_new = L_ms_gb + dL
 
-                check_limit_ms = abs(abs(theta_y[-1]) - TRB1_limit/n_safety_brg)
-
-                if check_limit_ms < 0:
-                    L_mb_new = L_mb + dL_ms
+                check_limit_ms = abs(abs(theta_y) - TRB1_limit/n_safety_brg)
+
+                if self.length_search == 'root':
+                    residual = abs(theta_y)-TRB1_limit/n_safety_brg
+                    if warm and len(bracket) == 0 and np.sign(residual - tol*sign) != sign:
+                        #the limit is reached short of the warm start, start over cold from L_mb_0
+                        warm = False
+                        [L_mb_new, searching] = [0.0, True]
+                    else:
+                        if len(bracket) == 0:
+                            [L_first,sign] = [L_mb,np.sign(residual)]
+                        [L_mb_new, searching] = length_search_step(L_mb, residual, bracket, length_max, tol, L_far=L_first + 2*dL_ms if warm else None)
                 else:
-                    L_mb_new = L_mb + dL_ms
+                    if check_limit_ms < 0:
+                        L_mb_new = L_mb + dL_ms
+                    else:
+                        L_mb_new = L_mb + dL_ms
+                    searching = abs(check_limit_ms)>tol and L_mb_new < length_max
+
+        if self.length_search == 'root':
+            self._converged['L_mb'] = [L_mb_new,sign]
+
+        if self.shaft_profiles:
+            #profiles of the last sizing iterate, between the main bearings and then from the second bearing to the shaft end
+            x_mb = np.linspace(L_rb, L_mb+L_rb, len_pts)
+            x_ms = np.linspace(L_rb + L_mb, L_ms_gb + L_mb +L_rb, len_pts)
+            self.shaft_x = np.concatenate([x_mb, x_ms])
+            loads_y = (-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight/(L_mb+L_ms_0))
+            self.shaft_moment = np.concatenate([(beam_moment(x_mb,*loads_y+([L_rb],[F_mb1_z]))**2 + beam_moment(x_mb,-M_r_z,-F_r_y,0.,[L_rb],[F_mb1_y])**2)**0.5,
+                                                (beam_moment(x_ms,*loads_y+([L_rb,L_rb+L_mb],[F_mb1_z,F_mb2_z]))**2 + beam_moment(x_ms,-M_r_z,-F_r_y,0.,[L_rb],[F_mb_y])**2)**0.5])
+            loads_y = (-M_r_y,rotorWeight*cos(radians(gamma))-F_r_z,lssWeight_new/(L_ms + L_mb))
+            self.shaft_slope = np.concatenate([beam_slope(x_mb,*loads_y+([L_rb],[F_mb1_z],C11)),
+                                               beam_slope(x_ms,*loads_y+([L_rb,L_rb+L_mb],[F_mb1_z,F_mb2_z],C11))])/E/I_2
+            self.shaft_deflection = np.concatenate([beam_deflection(x_mb,*loads_y+([L_rb],[F_mb1_z],C11,C21)),
+                                                    beam_deflection(x_ms,*loads_y+([L_rb,L_rb+L_mb],[F_mb1_z,F_mb2_z],C11,C21))])/E/I_2
 
         # fatigue check Taylor Parsons 6/14
         if check_fatigue == 1 or check_fatigue == 2:
@@ -454,115 +476,13 @@ class LowSpeedShaft_drive4pt(Component):
           density=7800.0
           n_safety = 2.5
           Sy = 490.0e6 # Pa
-          if self.S_ut > 0:
-            Sut = self.S_ut
-          else:
-            Sut=700.0e6 #Pa
-
-          #calculate material props for fatigue
-          Sm=0.9*Sut #for bending situations, material strength at 10^3 cycles
-          C_size=0.6 #diameter larger than 10"
-          C_surf=4.51*(Sut/1e6)**-.265 #machined surface 272*(Sut/1e6)**-.995 #forged
-          C_temp=1 #normal operating temps
-          C_reliab=0.814 #99% reliability
-          C_envir=1. #enclosed environment
-          Se=C_size*C_surf*C_temp*C_reliab*C_envir*.5*Sut #modified endurance limit for infinite life (should be Sf)\
-
-          if self.fatigue_exponent!=0:
-            SN_b = -1/self.fatigue_exponent
-          else:
-            Nfinal = 5e8 #point where fatigue limit occurs under hypothetical S-N curve TODO adjust to fit actual data
-            z=log10(1e3)-log10(Nfinal)  #assuming no endurance limit (high strength steel)
-            SN_b=1/z*log10(Sm/Se)
-          SN_a=Sm/(1000.**SN_b)
+          [Sut,SN_a,SN_b] = shaft_sn_curve(self.S_ut,self.fatigue_exponent)
           # print 'm:', -1/SN_b
           # print 'a:', SN_a
           if check_fatigue == 1:
               #Rotor Loads calculations using DS472
-              R=rotor_diameter/2.0
-              rotor_torque = (machine_rating * 1000 / DrivetrainEfficiency) / (rotor_freq * (pi/30))
-              Tip_speed_ratio= rotor_freq/30.*pi*R/V_rated
-              rho_air= 1.225 #kg/m^3 density of air
-              p_o = 4./3*rho_air*((4*pi*rotor_freq/60*R/3)**2+V_rated**2)*(pi*R/(blade_number*Tip_speed_ratio*(Tip_speed_ratio**2+1)**(.5)))
-              # print 'po:',p_o
-              n_c=blade_number*rotor_freq/60 #characteristic frequency on rotor from turbine of given blade number [Hz]
-              N_f=self.availability*n_c*(T_life*365*24*60*60)*exp(-(V_0/weibullA)**weibullk)-exp(-(V_f/weibullA)**weibullk) #number of rotor rotations based off of weibull curve. .827 comes from lower rpm than rated at lower wind speeds
-
-              k_b= 2.5 #calculating rotor pressure from all three blades. Use kb=1 for individual blades
-
-              if IEC_Class_Letter == 'A': # From IEC 61400-1 TODO consider calculating based off of 10-minute windspeed and weibull parameters, include neighboring wake effects?
-                I_t=0.18 
-              elif IEC_Class_Letter == 'B':
-                I_t=0.14
-              else:
-                I_t=0.12
-
-              Beta=0.11*k_b*(I_t+0.1)*(weibullA+4.4)
-
-              # find generic standardized stochastic load range distribution
-              def standardrange(N, N_f, Beta, k_b): 
-                  F_delta=(Beta*(log10(N_f)-log10(N)))+0.18
-                  if F_delta>=2*k_b:
-                    F_delta=0.
-                  return F_delta
-              # print N_f
-
-              def rounddown(x,step):
-                return int(floor(x/step))*step
-
-              def roundup(x,step):
-                  return int(ceil(x/step))*step
-
-              #for analysis with N on log scale, makes larger loads contain finer step sizes
-              num_pts=100
-              N=np.logspace( (log10(N_f)-(2*k_b-0.18)/Beta) , log10(N_f) , endpoint=True , num=num_pts) # with zeros: N=np.logspace(log10(1.0),log10(N_f),endpoint=True,num=num_pts)
-              N_rotor = N_f/3.
-              F_stoch=N.copy()
-
-              for i in range(num_pts):
-                  N[i]=roundup(N[i],1)
-
-              #print N
-
-              k_r=0.8 #assuming natural frequency of rotor is significantly larger than rotor rotational frequency
-
-              for i in range(num_pts):
-                F_stoch[i] = standardrange(N[i],N_f,Beta,k_b)
-              # print 'Standard1:'
-              # print F_stoch
-
-              Fx_factor = (.3649*log(rotor_diameter)-1.074)
-              Mx_factor = (.0799*log(rotor_diameter)-.2577)
-              My_factor = (.172*log(rotor_diameter)-.5943)
-              Mz_factor = (.1659*log(rotor_diameter)-.5795)
-
-              Fx_stoch = (F_stoch.copy()*0.5*p_o*(R))*Fx_factor
-              Mx_stoch = (F_stoch.copy()*0.45*p_o*(R)**2)*Mx_factor#*0.31
-              My_stoch = (F_stoch.copy()*0.33*p_o*k_r*(R)**2)*My_factor#*0.25
-              Mz_stoch = (F_stoch.copy()*0.33*p_o*k_r*(R)**2)*Mz_factor#*0.25 
-
-              # print np.max(N)
-              # print np.min(N)
-              # print np.max(Fx_stoch)
-              # print np.min(Fx_stoch)
-              # print np.max(Mx_stoch)
-              # print np.min(Mx_stoch)
-              # print np.max(My_stoch)
-              # print np.min(My_stoch)
-              # print np.max(Mz_stoch)
-              # print np.min(Mz_stoch)    
-              # print N
-              # print Fx_stoch
-              # print Mx_stoch          
-
-              def Ninterp(S,a,b):
-                  return (S/a)**(1/b)
-
-              def Goodman(S_alt,S_mean,Sut):
-                  return S_alt/(1-(S_mean/Sut))
-
-              Fx_mean=0.5*p_o*R*blade_number*Fx_factor
-              Mx_mean=0.5*rotor_torque*Mx_factor
+              [N,N_f,N_rotor,Fx_stoch,Mx_stoch,My_stoch,Mz_stoch,Fx_mean,Mx_mean] = ds472_load_spectrum(rotor_diameter,rotor_freq,machine_rating,DrivetrainEfficiency,\
+                  V_rated,V_0,V_f,weibullA,weibullk,T_life,self.availability,blade_number,IEC_Class_Letter)
               rotorWeight=rotor_mass*g
 
               # print 'Fx_max:', np.max(Fx_stoch) + Fx_mean
@@ -572,120 +492,52 @@ class LowSpeedShaft_drive4pt(Component):
               # print 'occurance:', np.min(N)
 
               #upwind bearing calculations
-              iterationstep=0.01
               diameter_limit = 5.0
-              print ''
-              while True:
+
+              def mb1_sufficient(D_max):
                   D_in=sR*D_max
                   D_max = (D_max**4 + D_in**4)**0.25
-                  D_min = (D_min**4 + D_in**4)**0.25
-                  D_med = (D_med**4 + D_in**4)**0.25
-                  I=(pi/64.0)*(D_max**4-D_in**4)
-                  J=I*2
-                  Area=pi/4.*(D_max**2-D_in**2)
-                  LssWeight=density*9.81*(((pi/12)*(D_max**2+D_med**2+D_max*D_med)*(L_mb))-(pi/4*L_mb*D_in**2))
-
-                  #create stochastic loads across N
-                  stoch_bend1 = (My_stoch**2+Mz_stoch**2)**(0.5)*D_max/(2.*I)
-                  stoch_shear1 = abs(Mx_stoch*D_max/(2.*J))
-                  stoch_normal1 = Fx_stoch/Area*cos(radians(gamma))
-                  stoch_stress1 = ((stoch_bend1+stoch_normal1)**2+3.*stoch_shear1**2)**(0.5)
-                  
-                  #create mean loads
-                  mean_bend1 = 0 #Fz_mean*L_rb*D_max/(2.*I) #not mean, but deterministic
-                  mean_shear1 = Mx_mean*D_max/(2.*J)
-                  mean_normal1 = Fx_mean/Area*cos(radians(gamma))+(rotorWeight+LssWeight)*sin(radians(gamma))
-                  mean_stress1 = ((mean_bend1+mean_normal1)**2+3.*mean_shear1**2)**(0.5)
-
-                  #apply Goodman with compressive (-) mean stress
-                  S_mod_stoch1=Goodman(stoch_stress1,-mean_stress1,Sut)
-
-                  #Use Palmgren-Miner linear damage rule to add damage from stochastic load ranges
-                  DEL_y=Fx_stoch.copy() #initialize
-                  for i in range(num_pts):
-                      DEL_y[i] = N[i]/(Ninterp(S_mod_stoch1[i],SN_a,SN_b))
+                  D_med_in = (D_med**4 + D_in**4)**0.25
+                  LssWeight=density*9.81*(((pi/12)*(D_max**2+D_med_in**2+D_max*D_med_in)*(L_mb))-(pi/4*L_mb*D_in**2))
 
-                  Damage = scp.integrate.simps(DEL_y,x= N, even='avg') #damage from stochastic loading
-
-                  #create deterministic loads occurring N_rotor times
-                  determ_stress1 = abs(rotorWeight*cos(radians(gamma))*L_rb*D_max/(2.*I)) #only deterministic stress at mb1 is bending due to rotor weight
-
-                  S_mod_determ=Goodman(determ_stress1,-mean_stress1,Sut)
-                  # print 'before deterministic Damage:', Damage
-
-                  Damage += N_rotor/(Ninterp(S_mod_determ,SN_a,SN_b))
+                  #only deterministic stress at mb1 is bending due to rotor weight
+                  Damage = ds472_shaft_damage(D_max,D_in,(My_stoch**2+Mz_stoch**2)**(0.5),Mx_stoch,Fx_stoch,rotorWeight*cos(radians(gamma))*L_rb,\
+                      Mx_mean,Fx_mean,rotorWeight+LssWeight,gamma,N,N_rotor,Sut,SN_a,SN_b)
                   # print 'Upwind Bearing Diameter:', D_max
                   # print 'Damage:', Damage
-                  if Damage < 1 or D_max >= diameter_limit:
-                      # print 'Upwind Bearing Diameter:', D_max
-                      # print 'Damage:', Damage
-                      # print 'unadjusted upwind diameter is %f m.' %(D_max)
-                      #print (time.time() - start_time), 'seconds of total simulation time'
-                      break
-                  else:
-                      D_max+=iterationstep
+                  return Damage < 1
+
+              print ''
+              D_max = fatigue_diameter(mb1_sufficient,D_max,diameter_limit,self.fatigue_tol,16)
+              D_in=sR*D_max
+              D_max = (D_max**4 + D_in**4)**0.25
+              D_min = (D_min**4 + D_in**4)**0.25
+              D_med = (D_med**4 + D_in**4)**0.25
 
               #downwind bearing calculations
               diameter_limit = 5.0
-              iterationstep=0.01
 
-              while True:
-                  I=(pi/64.0)*(D_med**4-D_in**4)
-                  J=I*2
-                  Area=pi/4.*(D_med**2-D_in**2)
+              def mb2_sufficient(D_med):
                   LssWeight=density*9.81*(((pi/12)*(D_max**2+D_med**2+D_max*D_med)*(L_mb))-(pi/4*L_mb*D_in**2))
-                  
-                  Fz1stoch = (-My_stoch)/(L_mb)
-                  Fy1stoch = Mz_stoch/L_mb
-                  My2stoch = 0. #My_stoch - abs(Fz1stoch)*L_mb #=0
-                  Mz2stoch = 0. #Mz_stoch - abs(Fy1stoch)*L_mb #=0
-
-                  #create stochastic loads across N
-                  stoch_bend2 = (My2stoch**2+Mz2stoch**2)**(0.5)*D_med/(2.*I)
-                  stoch_shear2 = abs(Mx_stoch*D_med/(2.*J))
-                  stoch_normal2 = Fx_stoch/Area*cos(radians(gamma)) #all normal force held by downwind bearing
-                  stoch_stress2 = ((stoch_bend2+stoch_normal2)**2+3.*stoch_shear2**2)**(0.5)
-                  #print stoch_stress2
-                  
-                  #create mean loads
-                  mean_bend2 = 0. #Fz_mean*L_rb*D_med/(2.*I) #not mean, but deterministic
-                  mean_shear2 = Mx_mean*D_med/(2.*J)
-                  mean_normal2 = Fx_mean/Area*cos(radians(gamma))+(rotorWeight+LssWeight)*sin(radians(gamma))
-                  mean_stress2 = ((mean_bend2+mean_normal2)**2+3.*mean_shear2**2)**(0.5)
-                  #apply Goodman with compressive (-) mean stress
-                  S_mod_stoch2=Goodman(stoch_stress2,-mean_stress2,Sut)
-
-                  #Use Palmgren-Miner linear damage rule to add damage from stochastic load ranges
-                  for i in range(num_pts):
-                      DEL_y[i] = N[i]/(Ninterp(S_mod_stoch2[i],SN_a,SN_b))
-
-                  Damage = scp.integrate.simps(DEL_y, x=N , even='avg') #damage from stochastic loading
-
-                  #create deterministic loads occurring N_rotor times
-                  Fz1determ = (gbxWeight*L_gb - LssWeight*.5*L_mb - rotorWeight*(L_mb+L_rb)) / (L_mb)
-                  My2determ = gbxWeight*L_gb #-rotorWeight*(L_rb+L_mb) + Fz1determ*L_mb - LssWeight*.5*L_mb + gbxWeight*L_gb
-                  determ_stress2 = abs(My2determ*D_med/(2.*I))
-
-                  S_mod_determ2=Goodman(determ_stress2,-mean_stress2,Sut)
 
-                  if S_mod_determ2 > 0:
-                    Damage += N_rotor/(Ninterp(S_mod_determ2,SN_a,SN_b))
-                  # print 'max stochastic:', np.max(S_mod_stoch2)
+                  #all normal force held by downwind bearing, no stochastic bending at mb2
+                  My2determ = gbxWeight*L_gb #-rotorWeight*(L_rb+L_mb) + Fz1determ*L_mb - LssWeight*.5*L_mb + gbxWeight*L_gb
+                  Damage = ds472_shaft_damage(D_med,D_in,0.,Mx_stoch,Fx_stoch,My2determ,\
+                      Mx_mean,Fx_mean,rotorWeight+LssWeight,gamma,N,N_rotor,Sut,SN_a,SN_b)
                   # print ''
                   # print 'Downwind Bearing Diameter:', D_med
                   # print 'Damage:', Damage
-                  if Damage < 1 or D_med >= diameter_limit:
-                      # print ''
-                      # print 'Downwind Bearing Diameter:', D_med
-                      # print 'Damage:', Damage
-                      #print (time.time() - start_time), 'seconds of total simulation time'
-                      break
-                  else:
-                      D_med+=iterationstep
+                  return Damage < 1
+
+              D_med = fatigue_diameter(mb2_sufficient,D_med,diameter_limit,self.fatigue_tol,16)
+              LssWeight=density*9.81*(((pi/12)*(D_max**2+D_med**2+D_max*D_med)*(L_mb))-(pi/4*L_mb*D_in**2))
 
               #begin bearing calculations
               N_bearings = N/blade_number #counts per rotation (not defined by characteristic frequency 3n_rotor)
 
+              Fz1stoch = (-My_stoch)/(L_mb)
+              Fy1stoch = Mz_stoch/L_mb
+              Fz1determ = (gbxWeight*L_gb - LssWeight*.5*L_mb - rotorWeight*(L_mb+L_rb)) / (L_mb)
               Fr1_range = ((abs(Fz1stoch)+abs(Fz1determ))**2 +Fy1stoch**2)**.5 #radial stochastic + deterministic mean
               Fa1_range = np.zeros(len(Fy1stoch))
 
@@ -698,8 +550,8 @@ class LowSpeedShaft_drive4pt(Component):
 
               life_bearing = N_f/blade_number
 
-              [D_max_a,FW_max,bearing1mass] = fatigue_for_bearings(D_max, Fr1_range, Fa1_range, N_bearings, life_bearing, self.mb1Type)
-              [D_med_a,FW_med,bearing2mass] = fatigue_for_bearings(D_med, Fr2_range, Fa2_range, N_bearings, life_bearing, self.mb2Type)  
+              [D_max_a,FW_max,bearing1mass] = fatigue_for_bearings(D_max, Fr1_range, Fa1_range, N_bearings, life_bearing, self.mb1Type, self.bearing_selection)
+              [D_med_a,FW_med,bearing2mass] = fatigue_for_bearings(D_med, Fr2_range, Fa2_range, N_bearings, life_bearing, self.mb2Type, self.bearing_selection)  
 
           elif check_fatigue == 2:
             Fx = self.rotor_thrust_distribution
@@ -720,63 +572,29 @@ class LowSpeedShaft_drive4pt(Component):
             print Mx*.5
             print -1/SN_b
 
-            def Ninterp(L_ult,L_range,m):
-                return (L_ult/(.5*L_range))**m #TODO double-check that the input will be the load RANGE instead of load amplitudes. May also include means
-
             #upwind bearing calcs
             diameter_limit = 5.0
-            iterationstep=0.01
-            #upwind bearing calcs
-            while True:
-                Damage = 0
-                Fx_ult = SN_a*(pi/4.*(D_max**2-D_in**2))
-                Fyz_ult = SN_a*(pi*(D_max**4-D_in**4))/(D_max*64.)/L_rb
-                Mx_ult = SN_a*(pi*(D_max**4-D_in**4))/(32*(3)**.5*D_max)
-                Myz_ult = SN_a*(pi*(D_max**4-D_in**4))/(D_max*64.)
-                if Fx_ult !=0 and np.all(n_Fx) != 0:
-                    Damage+=scp.integrate.simps(n_Fx/Ninterp(Fx_ult,Fx,-1/SN_b),x=n_Fx,even = 'avg')
-                if Fyz_ult !=0:
-                    if np.all(n_Fy) != 0:
-                        Damage+=scp.integrate.simps(abs(n_Fy/Ninterp(Fyz_ult,Fy,-1/SN_b)),x=n_Fy,even = 'avg')
-                    if np.all(n_Fz) != 0:
-                        Damage+=scp.integrate.simps(abs(n_Fz/Ninterp(Fyz_ult,Fz,-1/SN_b)),x=n_Fz,even = 'avg')
-                if Mx_ult !=0 and np.all(n_Mx) != 0:
-                    Damage+=scp.integrate.simps(abs(n_Mx/Ninterp(Mx_ult,Mx,-1/SN_b)),x=n_Mx,even = 'avg')
-                if Myz_ult!=0:
-                    if np.all(n_My) != 0:
-                        Damage+=scp.integrate.simps(abs(n_My/Ninterp(Myz_ult,My,-1/SN_b)),x=n_My,even = 'avg')
-                    if np.all(n_Mz) != 0:
-                        Damage+=scp.integrate.simps(abs(n_Mz/Ninterp(Myz_ult,Mz,-1/SN_b)),x=n_Mz,even = 'avg')
-
-                print 'Upwind Bearing Diameter:', D_max
-                print 'Damage:', Damage
-
-                if Damage <= 1 or D_max >= diameter_limit:
-                    # print 'Upwind Bearing Diameter:', D_max
-                    # print 'Damage:', Damage
-                    #print (time.time() - start_time), 'seconds of total simulation time'
-                    break
-                else:
-                    D_max+=iterationstep
+
+            spectra = {'Fx':(Fx,n_Fx), 'Fy':(Fy,n_Fy), 'Fz':(Fz,n_Fz), 'Mx':(Mx,n_Mx), 'My':(My,n_My), 'Mz':(Mz,n_Mz)}
+
+            def mb1_sufficient(D_max):
+                Damage = shaft_range_damage(D_max,D_in,L_rb,SN_a,SN_b,spectra)
+                # print 'Upwind Bearing Diameter:', D_max
+                # print 'Damage:', Damage
+                return Damage <= 1
+
+            D_max = fatigue_diameter(mb1_sufficient,D_max,diameter_limit,self.fatigue_tol,16)
+            print 'Upwind Bearing Diameter:', D_max
+
             #downwind bearing calcs
-            while True:
-                Damage = 0
-                Fx_ult = SN_a*(pi/4.*(D_med**2-D_in**2))
-                Mx_ult = SN_a*(pi*(D_med**4-D_in**4))/(32*(3)**.5*D_med)
-                if Fx_ult !=0:
-                    Damage+=scp.integrate.simps(n_Fx/Ninterp(Fx_ult,Fx,-1/SN_b),x=n_Fx,even = 'avg')
-                if Mx_ult !=0:
-                    Damage+=scp.integrate.simps(n_Mx/Ninterp(Mx_ult,Mx,-1/SN_b),x=n_Mx,even = 'avg')
-                print 'Downwind Bearing Diameter:', D_med
-                print 'Damage:', Damage
-
-                if Damage <= 1 or D_med>= diameter_limit:
-                    # print 'Upwind Bearing Diameter:', D_max
-                    # print 'Damage:', Damage
-                    #print (time.time() - start_time), 'seconds of total simulation time'
-                    break
-                else:
-                    D_med+=iterationstep
+            def mb2_sufficient(D_med):
+                Damage = shaft_range_damage(D_med,D_in,L_rb,SN_a,SN_b,dict((channel, spectra[channel]) for channel in ('Fx','Mx')),absolute=(),skip_zero_counts=False)
+                # print 'Downwind Bearing Diameter:', D_med
+                # print 'Damage:', Damage
+                return Damage <= 1
+
+            D_med = fatigue_diameter(mb2_sufficient,D_med,diameter_limit,self.fatigue_tol,16)
+            print 'Downwind Bearing Diameter:', D_med
 
             #bearing calcs
             if self.availability != 0 and rotor_freq != 0 and T_life != 0 and V_f != 0 and weibullA != 0:
@@ -790,20 +608,28 @@ class LowSpeedShaft_drive4pt(Component):
             Fz1_My = My/L_mb
             Fy1_Fy = -Fy*(L_mb+L_rb)/L_mb
             Fy1_Mz = Mz/L_mb
-            [D_max_a,FW_max,bearing1mass] = fatigue2_for_bearings(D_max,self.mb1Type,np.zeros(2),np.array([1,2]),Fy1_Fy,n_Fy/blade_number,Fz1_Fz,n_Fz/blade_number,Fz1_My,n_My/blade_number,Fy1_Mz,n_Mz/blade_number,N_rotations)
+            [D_max_a,FW_max,bearing1mass] = fatigue2_for_bearings(D_max,self.mb1Type,np.zeros(2),np.array([1,2]),Fy1_Fy,n_Fy/blade_number,Fz1_Fz,n_Fz/blade_number,Fz1_My,n_My/blade_number,Fy1_Mz,n_Mz/blade_number,N_rotations,self.bearing_selection)
             # print 'Downwind bearing calcs'
             Fz2_Fz = Fz*L_rb/L_mb
             Fz2_My = My/L_mb
             Fy2_Fy = Fy*L_rb/L_mb
             Fy2_Mz = Mz/L_mb
-            [D_med_a,FW_med,bearing2mass] = fatigue2_for_bearings(D_med,self.mb2Type,Fx,n_Fx/blade_number,Fy2_Fy,n_Fy/blade_number,Fz2_Fz,n_Fz/blade_number,Fz2_My,n_My/blade_number,Fy2_Mz,n_Mz/blade_number,N_rotations)
+            [D_med_a,FW_med,bearing2mass] = fatigue2_for_bearings(D_med,self.mb2Type,Fx,n_Fx/blade_number,Fy2_Fy,n_Fy/blade_number,Fz2_Fz,n_Fz/blade_number,Fz2_My,n_My/blade_number,Fy2_Mz,n_Mz/blade_number,N_rotations,self.bearing_selection)
 
         else: #if fatigue_check is not true, resize based on diameter
-            [D_max_a,FW_max,bearing1mass] = resize_for_bearings(D_max,  self.mb1Type)
-            [D_med_a,FW_med,bearing2mass] = resize_for_bearings(D_med,  self.mb2Type)
+            [D_max_a,FW_max,bearing1mass] = resize_for_bearings(D_max,  self.mb1Type, self.bearing_selection)
+            [D_med_a,FW_med,bearing2mass] = resize_for_bearings(D_med,  self.mb2Type, self.bearing_selection)
 
         # end fatigue code additions 6/2014
             
+        self.shaft_properties(D_max,D_max_a,D_med_a,D_in,L_mb,L_mb_new,FW_max,FW_med,bearing1mass,bearing2mass,flange_length,gamma,density)
+
+    def shaft_properties(self,D_max,D_max_a,D_med_a,D_in,L_mb,L_mb_new,FW_max,FW_med,bearing1mass,bearing2mass,flange_length,gamma,density):
+        '''
+        Length, diameters, mass properties and bearings of the shaft between main bearings L_mb apart, with bearings resized to
+        D_max_a and D_med_a of facewidths FW_max and FW_med. L_mb_new places the bearings and sets the length.
+        '''
+
         lss_mass_new=(pi/3)*(D_max_a**2+D_med_a**2+D_max_a*D_med_a)*(L_mb-(FW_max+FW_med)/2)*density/4+ \
                          (pi/4)*(D_max_a**2-D_in**2)*density*FW_max+\
                          (pi/4)*(D_med_a**2-D_in**2)*density*FW_med-\
@@ -860,6 +686,282 @@ class LowSpeedShaft_drive4pt(Component):
         self.bearing_mass1 = bearing1mass
         self.bearing_mass2 = bearing2mass
 
+    def size_batch(self, **cases):
+        '''
+        Static sizing (check_fatigue 0) of the shaft for many load cases in one call. Hub loads, rotor mass and shaft geometry given
+        as keyword arrays replace the component inputs and are broadcast to a common shape; the cases are sized in lockstep and drop
+        out of the length searches as they converge. Returns a dict of outputs with one entry per case.
+        '''
+        names = ['rotor_force_x','rotor_force_y','rotor_force_z','rotor_bending_moment_x','rotor_bending_moment_y','rotor_bending_moment_z',
+                 'rotor_mass','rotor_diameter','gearbox_mass','shrink_disc_mass','shaft_angle','shaft_ratio','L_rb','overhang','flange_length']
+        if self.check_fatigue != 0:
+            raise ValueError('batch sizing has no fatigue check, check_fatigue must be 0')
+        for name in cases:
+            if name not in names:
+                raise ValueError('%s is not a batch sizing input, must be one of %s' % (name, ', '.join(names)))
+        values = np.broadcast_arrays(*[np.asarray(cases.get(name, getattr(self, name)), dtype=float) for name in names])
+        shape = values[0].shape
+        [F_r_x,F_r_y,F_r_z,M_r_x,M_r_y,M_r_z,rotor_mass,rotor_diameter,gearbox_mass,shrink_disc_mass,gamma,sR,L_rb,overhang,flange_length] = \
+            [x.ravel() for x in values]
+        n = F_r_x.size
+
+        #input parameters
+        g=9.81
+        flange_length = np.where(flange_length == 0, 0.9918*np.exp(.0068*rotor_diameter), flange_length)
+        L_rb = np.where(L_rb == 0, 0.007835*rotor_diameter+0.9642, L_rb)
+        cos_gamma = np.cos(np.radians(gamma))
+        sin_gamma = np.sin(np.radians(gamma))
+        L_ms_0=0.5 # main shaft length downwind of main bearing
+        tol=1e-4
+        L_bg = 6.11-L_rb    #distance from first main bearing to gearbox yokes
+        L_gb = 0.0          #distance to gbx center from trunnions in x-dir
+        H_gb = 1.0          #distance to gbx center from trunnions in z-dir
+
+        #material properties
+        E=2.1e11
+        density=7800.0
+        n_safety = 2.5
+        Sy = 66000 #psi
+
+        #unit conversion
+        u_knm_inlb = 8850.745454036
+        u_in_m = 0.0254000508001
+
+        #bearing deflection limits
+        TRB1_limit = 3.0/60.0/180.0*pi
+        n_safety_brg = 1.0
+
+        length_max = overhang - L_rb + (self.gearbox_cm[0] -self.gearbox_length/2.)
+        rotorWeight = rotor_mass*g
+        gbxWeight = gearbox_mass*g
+        shrinkDiscWeight = shrink_disc_mass*g
+
+        def shaft_diameter(MM, M_r_x):
+            return (16.0*n_safety/pi/Sy*(4.0*(MM*u_knm_inlb/1000)**2+3.0*(M_r_x*u_knm_inlb/1000)**2)**0.5)**(1.0/3.0)*u_in_m
+
+        #case states, filled in place in the workspace buffers
+        [D_max,D_min,D_med,D_in,L_ms,L_ms_new,L_mb,L_mb_new,lssWeight,F_mb_y,F_mb_z,residual] = \
+            [workspace_array(self._workspace,name,(n,)) for name in ['D_max','D_min','D_med','D_in','L_ms','L_ms_new','L_mb','L_mb_new',
+                                                                   'lssWeight','F_mb_y','F_mb_z','residual']]
+
+        #main shaft supported at main bearing and gearbox
+        D_max.fill(1.)
+        D_min.fill(0.2)
+        L_ms.fill(L_ms_0)
+        L_ms_new.fill(0.)
+        lssWeight.fill(0.)
+        F_mb_y.fill(0.)
+        F_mb_z.fill(0.)
+        active = L_ms_new < length_max
+        bracket = {}
+        while active.any():
+            i = np.flatnonzero(active)
+            L_ms[i] = np.where(L_ms_new[i] > 0, L_ms_new[i], L_ms_0)
+            L = L_ms[i]
+            lssWeight[i] = pi/3.0*(D_max[i]**2 + D_min[i]**2 + D_max[i]*D_min[i])*L*density*g/4.0
+            F_mb_y[i] = +M_r_z[i]/L_bg[i] - F_r_y[i]*(L_bg[i] + L_rb[i])/L_bg[i]
+            F_mb_z[i] = (-M_r_y[i] + rotorWeight[i]*(cos_gamma[i]*(L_rb[i] + L_bg[i]) + sin_gamma[i]*H_gb) + lssWeight[i]*(L_bg[i] - L/2.0)*cos_gamma[i] \
+                         + shrinkDiscWeight[i]*cos_gamma[i]*(L_bg[i] - L) - gbxWeight[i]*cos_gamma[i]*L_gb - F_r_z[i]*cos_gamma[i]*(L_bg[i] + L_rb[i]))/L_bg[i]
+
+            loads_y = (-M_r_y[i],rotorWeight[i]*cos_gamma[i]-F_r_z[i],lssWeight[i]/L)
+            loads_z = (-M_r_z[i],-F_r_y[i],0.)
+            MM_max = np.maximum(beam_moment_max(0.0,L_rb[i],loads_y,loads_z,self._workspace),
+                                beam_moment_max(L_rb[i],L_rb[i]+L,loads_y+([L_rb[i]],[F_mb_z[i]]),loads_z+([L_rb[i]],[F_mb_y[i]]),self._workspace))
+            MM_min = (beam_moment(L_rb[i]+L,*loads_y+([L_rb[i]],[F_mb_z[i]]))**2 + beam_moment(L_rb[i]+L,*loads_z+([L_rb[i]],[F_mb_y[i]]))**2)**0.5
+
+            D = shaft_diameter(MM_max,M_r_x[i])
+            D_in[i] = sR[i]*D
+            D_max[i] = (D**4 + D_in[i]**4)**0.25
+            D_min[i] = (shaft_diameter(MM_min,M_r_x[i])**4 + D_in[i]**4)**0.25
+            lssWeight_new=((pi/3)*(D_max[i]**2+D_min[i]**2+D_max[i]*D_min[i])*L*density/4+(-pi/4*(D_in[i]**2)*density*L))*g
+
+            loads_y = (-M_r_y[i],rotorWeight[i]*cos_gamma[i]-F_r_z[i],lssWeight_new/(L + L_rb[i]),[L_rb[i]],[F_mb_z[i]])
+            [C1,C2] = beam_constants(L_rb[i],L_rb[i]+L,*loads_y)
+            theta_y = beam_slope(L_rb[i]+L,*loads_y+(C1,))/E/(pi/64.0*(D_max[i]**4 - D_in[i]**4))
+
+            residual.fill(0.)
+            residual[i] = abs(theta_y)-TRB1_limit/n_safety_brg
+            if self.length_search == 'root':
+                [L_ms_new, active] = batch_length_search_step(L_ms, residual, bracket, length_max, tol, active)
+            else:
+                L_ms_new[i] = L + 0.05
+                active[i] = (abs(residual[i]) > tol) & (L_ms_new[i] < length_max[i])
+
+        #shaft supported at both main bearings
+        L_ms = L_ms_0
+        L_ms_gb = L_ms_0
+        L_mb_0 = L_ms_new
+        L_mb[:] = L_mb_0
+        L_mb_new.fill(0.)
+        D_med.fill(0.)
+        D_in.fill(0.)
+        active = L_mb_new < length_max
+        bracket = {}
+        while active.any():
+            i = np.flatnonzero(active)
+            L_mb[i] = np.where(L_mb_new[i] > 0, L_mb_new[i], L_mb_0[i])
+            L = L_mb[i]
+            F_mb2_y = -M_r_z[i]/L + F_r_y[i]*(L_rb[i])/L
+            F_mb2_z = (M_r_y[i] - rotorWeight[i]*cos_gamma[i]*L_rb[i] - lssWeight[i]*(L_ms_gb+L)/2.0*cos_gamma[i] - shrinkDiscWeight[i]*(L+L_ms_0)*cos_gamma[i] \
+                       + gbxWeight[i]*cos_gamma[i]*L_gb + F_r_z[i]*cos_gamma[i]*L_rb[i])/L
+            F_mb1_y = -F_r_y[i] - F_mb2_y
+            F_mb1_z = (rotorWeight[i] + lssWeight[i] + shrinkDiscWeight[i])*cos_gamma[i] - F_r_z[i] - F_mb2_z
+
+            loads_y = (-M_r_y[i],rotorWeight[i]*cos_gamma[i]-F_r_z[i],lssWeight[i]/(L+L_ms_0))
+            loads_z = (-M_r_z[i],-F_r_y[i],0.)
+            MM_max = np.maximum(np.maximum(beam_moment_max(0.0,L_rb[i],loads_y,loads_z,self._workspace),
+                                           beam_moment_max(L_rb[i],L_rb[i]+L,loads_y+([L_rb[i]],[F_mb1_z]),loads_z+([L_rb[i]],[F_mb1_y]),self._workspace)),
+                                beam_moment_max(L_rb[i]+L,L_rb[i]+L+L_ms_gb,loads_y+([L_rb[i],L_rb[i]+L],[F_mb1_z,F_mb2_z]),loads_z+([L_rb[i]],[F_mb_y[i]]),self._workspace))
+            MM_min = (beam_moment(L_rb[i]+L+L_ms_gb,*loads_y+([L_rb[i],L_rb[i]+L],[F_mb1_z,F_mb2_z]))**2 \
+                      + beam_moment(L_rb[i]+L+L_ms_gb,*loads_z+([L_rb[i]],[F_mb_y[i]]))**2)**0.5
+            MM_med = (beam_moment(L_rb[i]+L,*loads_y+([L_rb[i]],[F_mb1_z]))**2 + beam_moment(L_rb[i]+L,*loads_z+([L_rb[i]],[F_mb1_y]))**2)**0.5
+
+            D = shaft_diameter(MM_max,M_r_x[i])
+            D_in[i] = sR[i]*D
+            D_max[i] = (D**4 + D_in[i]**4)**0.25
+            D_min[i] = (shaft_diameter(MM_min,M_r_x[i])**4 + D_in[i]**4)**0.25
+            D_med[i] = (shaft_diameter(MM_med,M_r_x[i])**4 + D_in[i]**4)**0.25
+            lssWeight_new = (density*pi/12.0*L*(D_max[i]**2+D_med[i]**2 + D_max[i]*D_med[i]) - density*pi/4.0*D_in[i]**2*L)*g
+
+            loads_y = (-M_r_y[i],rotorWeight[i]*cos_gamma[i]-F_r_z[i],lssWeight_new/(L_ms + L))
+            [C11,C21] = beam_constants(L_rb[i],L_rb[i]+L,*loads_y+([L_rb[i]],[F_mb1_z]))
+            theta_y = beam_slope(L_rb[i]+L+L_ms_gb,*loads_y+([L_rb[i],L_rb[i]+L],[F_mb1_z,F_mb2_z],C11))/E/(pi/64.0*(D_max[i]**4 - D_in[i]**4))
+
+            residual.fill(0.)
+            residual[i] = abs(theta_y)-TRB1_limit/n_safety_brg
+            if self.length_search == 'root':
+                [L_mb_new, active] = batch_length_search_step(L_mb, residual, bracket, length_max, tol, active)
+            else:
+                L_mb_new[i] = L + 0.05
+                active[i] = (abs(residual[i]) > tol) & (L_mb_new[i] < length_max[i])
+
+        #resize for bearings
+        [D_max_a,FW_max,bearing1mass] = batch_resize_for_bearings(D_max, self.mb1Type, self.bearing_selection).T
+        [D_med_a,FW_med,bearing2mass] = batch_resize_for_bearings(D_med, self.mb2Type, self.bearing_selection).T
+
+        lss_mass_new=(pi/3)*(D_max_a**2+D_med_a**2+D_max_a*D_med_a)*(L_mb-(FW_max+FW_med)/2)*density/4+ \
+                         (pi/4)*(D_max_a**2-D_in**2)*density*FW_max+\
+                         (pi/4)*(D_med_a**2-D_in**2)*density*FW_med-\
+                         (pi/4)*(D_in**2)*density*(L_mb+(FW_max+FW_med)/2)
+        length = L_mb_new + (FW_max+FW_med)/2 + flange_length
+        mass = lss_mass_new*1.33
+
+        # mass properties
+        downwind_location = np.array([self.gearbox_cm[0]-self.gearbox_length/2. , self.gearbox_cm[1] , self.gearbox_cm[2] ])
+        direction = np.column_stack([-cos_gamma, np.zeros(n), sin_gamma])
+        bearing_location1 = downwind_location + (L_mb_new + FW_med/2)[:,np.newaxis]*direction
+        bearing_location2 = downwind_location + (FW_med*.5)[:,np.newaxis]*direction
+        cm = downwind_location + (0.65*length)[:,np.newaxis]*direction
+        cm[:,[0,2]] = (cm[:,[0,2]]*mass[:,np.newaxis] + downwind_location[[0,2]]*shrink_disc_mass[:,np.newaxis]) / (mass+shrink_disc_mass)[:,np.newaxis]
+        mass = mass + shrink_disc_mass
+        I = np.zeros((n,3))
+        I[:,0] = mass * (D_in ** 2.0 + D_max ** 2.0) / 8.0
+        I[:,1] = mass * (D_in ** 2.0 + D_max ** 2.0 + (4.0 / 3.0) * (length ** 2.0)) / 16.0
+        I[:,2] = I[:,1]
+
+        outputs = {'length':length, 'diameter1':D_max_a, 'diameter2':D_med_a, 'mass':mass, 'FW_mb1':FW_max, 'FW_mb2':FW_med,
+                   'bearing_mass1':bearing1mass, 'bearing_mass2':bearing2mass}
+        for name in outputs:
+            outputs[name] = outputs[name].reshape(shape)
+        outputs.update({'cm':cm.reshape(shape + (3,)), 'I':I.reshape(shape + (3,)),
+                        'bearing_location1':bearing_location1.reshape(shape + (3,)), 'bearing_location2':bearing_location2.reshape(shape + (3,))})
+        return outputs
+
+    def fatigue_analysis(self):
+        '''
+        Fatigue damage of the shaft and L10 life of both main bearings for the given geometry D_mb1, D_mb2, L_mb, without sizing.
+        Uses the rotor load distributions if check_fatigue is 2 and the DS472 load spectrum otherwise.  Length, diameters and mass
+        properties are those of the given shaft, with the catalog bearings fitting it.
+        '''
+        g=9.81
+        density=7800.0
+        gamma=self.shaft_angle
+        blade_number = self.blade_number
+        rotor_mass = self.rotor_mass
+        if rotor_mass < 100:
+            rotor_mass = get_rotor_mass(self.machine_rating)
+        if self.L_rb == 0: #distance from hub center to main bearing
+            L_rb = get_L_rb(self.rotor_diameter)
+        else:
+            L_rb = self.L_rb
+        L_gb = 0.0
+        gbxWeight = self.gearbox_mass*g
+        shrinkDiscWeight = self.shrink_disc_mass*g
+
+        D_max = self.D_mb1
+        D_med = self.D_mb2
+        L_mb = self.L_mb
+        D_in = self.shaft_ratio*D_max
+
+        [Sut,SN_a,SN_b] = shaft_sn_curve(self.S_ut,self.fatigue_exponent)
+
+        if self.check_fatigue == 2:
+            Fx = self.rotor_thrust_distribution
+            n_Fx = self.rotor_thrust_count
+            Fy = self.rotor_Fy_distribution
+            n_Fy = self.rotor_Fy_count
+            Fz = self.rotor_Fz_distribution
+            n_Fz = self.rotor_Fz_count
+            Mx = self.rotor_torque_distribution
+            n_Mx = self.rotor_torque_count
+            My = self.rotor_My_distribution
+            n_My = self.rotor_My_count
+            Mz = self.rotor_Mz_distribution
+            n_Mz = self.rotor_Mz_count
+
+            spectra = {'Fx':(Fx,n_Fx), 'Fy':(Fy,n_Fy), 'Fz':(Fz,n_Fz), 'Mx':(Mx,n_Mx), 'My':(My,n_My), 'Mz':(Mz,n_Mz)}
+            self.damage_mb1 = shaft_range_damage(D_max,D_in,L_rb,SN_a,SN_b,spectra)
+            self.damage_mb2 = shaft_range_damage(D_med,D_in,L_rb,SN_a,SN_b,dict((channel, spectra[channel]) for channel in ('Fx','Mx')),absolute=(),skip_zero_counts=False)
+
+            #bearing loads
+            Fz1_Fz = Fz*(L_mb+L_rb)/L_mb
+            Fz1_My = My/L_mb
+            Fy1_Fy = -Fy*(L_mb+L_rb)/L_mb
+            Fy1_Mz = Mz/L_mb
+            [P_eq1,p1] = equivalent_bearing_load2(self.mb1Type,np.zeros(2),np.array([1,2]),Fy1_Fy,n_Fy/blade_number,Fz1_Fz,n_Fz/blade_number,Fz1_My,n_My/blade_number,Fy1_Mz,n_Mz/blade_number)
+            Fz2_Fz = Fz*L_rb/L_mb
+            Fz2_My = My/L_mb
+            Fy2_Fy = Fy*L_rb/L_mb
+            Fy2_Mz = Mz/L_mb
+            [P_eq2,p2] = equivalent_bearing_load2(self.mb2Type,Fx,n_Fx/blade_number,Fy2_Fy,n_Fy/blade_number,Fz2_Fz,n_Fz/blade_number,Fz2_My,n_My/blade_number,Fy2_Mz,n_Mz/blade_number)
+
+        else:
+            [N,N_f,N_rotor,Fx_stoch,Mx_stoch,My_stoch,Mz_stoch,Fx_mean,Mx_mean] = ds472_load_spectrum(self.rotor_diameter,self.rotor_freq,self.machine_rating,self.DrivetrainEfficiency,\
+                self.Vrated,self.cut_in,self.cut_out,self.weibull_A,self.weibull_k,self.T_life,self.availability,blade_number,self.IEC_Class)
+            rotorWeight=rotor_mass*g
+            LssWeight=density*9.81*(((pi/12)*(D_max**2+D_med**2+D_max*D_med)*(L_mb))-(pi/4*L_mb*D_in**2))
+
+            self.damage_mb1 = ds472_shaft_damage(D_max,D_in,(My_stoch**2+Mz_stoch**2)**(0.5),Mx_stoch,Fx_stoch,rotorWeight*cos(radians(gamma))*L_rb,\
+                Mx_mean,Fx_mean,rotorWeight+LssWeight,gamma,N,N_rotor,Sut,SN_a,SN_b)
+            self.damage_mb2 = ds472_shaft_damage(D_med,D_in,0.,Mx_stoch,Fx_stoch,gbxWeight*L_gb,\
+                Mx_mean,Fx_mean,rotorWeight+LssWeight,gamma,N,N_rotor,Sut,SN_a,SN_b)
+
+            #bearing loads
+            N_bearings = N/blade_number
+            Fz1stoch = (-My_stoch)/(L_mb)
+            Fy1stoch = Mz_stoch/L_mb
+            Fz1determ = (gbxWeight*L_gb - LssWeight*.5*L_mb - rotorWeight*(L_mb+L_rb)) / (L_mb)
+            Fr1_range = ((abs(Fz1stoch)+abs(Fz1determ))**2 +Fy1stoch**2)**.5
+            Fa1_range = np.zeros(len(Fy1stoch))
+            Fy2stoch = -Mz_stoch/(L_mb)
+            Fz2stoch = -(LssWeight*2./3.*L_mb-My_stoch)/(L_mb) + (LssWeight+shrinkDiscWeight+gbxWeight)*cos(radians(gamma)) - rotorWeight
+            Fr2_range = (Fy2stoch**2+(Fz2stoch+abs(-rotorWeight*L_rb + 0.5*LssWeight+gbxWeight*L_gb/L_mb))**2)**0.5
+            Fa2_range = Fx_stoch*cos(radians(gamma)) + (rotorWeight+LssWeight)*sin(radians(gamma))
+            [P_eq1,p1] = equivalent_bearing_load(Fr1_range,Fa1_range,N_bearings,self.mb1Type)
+            [P_eq2,p2] = equivalent_bearing_load(Fr2_range,Fa2_range,N_bearings,self.mb2Type)
+
+        self.L10_mb1 = bearing_life(D_max,self.mb1Type,P_eq1,p1,self.C_mb1)
+        self.L10_mb2 = bearing_life(D_med,self.mb2Type,P_eq2,p2,self.C_mb2)
+
+        #mass properties of the given shaft, on the catalog bearings fitting it
+        if self.flange_length == 0:
+            flange_length = 0.9918*exp(.0068*self.rotor_diameter)
+        else:
+            flange_length = self.flange_length
+        [D_a,FW_max,bearing1mass] = resize_for_bearings(D_max, self.mb1Type, self.bearing_selection)
+        [D_a,FW_med,bearing2mass] = resize_for_bearings(D_med, self.mb2Type, self.bearing_selection)
+        self.shaft_properties(D_max,D_max,D_med,D_in,L_mb,L_mb,FW_max,FW_med,bearing1mass,bearing2mass,flange_length,gamma,density)
+
 #-------------------------------------------------------------------------------
 class LowSpeedShaft_drive3pt(Component):
     ''' LowSpeedShaft class
@@ -894,6 +996,11 @@ class LowSpeedShaft_drive3pt(Component):
 
     L_rb = Float(iotype='in', units='m', desc='distance between hub center and upwind main bearing')
     check_fatigue = Int(iotype = 'in', desc = 'turns on and off fatigue check')
+    bearing_selection = Enum('bore', ('bore','mass'), iotype='in', desc='main bearing selection from catalog: smallest bore or lightest bearing meeting bore and load rating')
+    length_search = Enum('root', ('root','step'), iotype='in', desc='search of shaft lengths on the bearing slope limit: bracketed root solve or fixed length steps')
+    fatigue_tol = Float(0.01, iotype='in', units='m', desc='diameter resolution of the fatigue check')
+    shaft_profiles = Bool(False, iotype='in', desc='also output moment, slope and deflection profiles of the statically sized shaft')
+    warm_start = Bool(False, iotype='in', desc='start the root search of shaft lengths next to the last shaft sized by this component, falling back to a cold start')
     fatigue_exponent = Float(iotype = 'in', desc = 'fatigue exponent of material')
     S_ut = Float(iotype = 'in', units = 'Pa', desc = 'ultimate tensile strength of material')
     weibull_A = Float(iotype = 'in', units = 'm/s', desc = 'weibull scale parameter "A" of 10-minute windspeed probability distribution')
@@ -920,6 +1027,13 @@ class LowSpeedShaft_drive3pt(Component):
     rotor_My_count = Array(iotype='in', desc = 'corresponding cycle array for My distribution') 
     rotor_Mz_distribution = Array(iotype='in', units ='N*m', desc = 'Mz distribution across turbine life')
     rotor_Mz_count = Array(iotype='in', desc = 'corresponding cycle array for Mz distribution') 
+
+    # fatigue analysis of a given shaft
+    analysis_only = Bool(False, iotype='in', desc='evaluate fatigue damage and bearing life of the given shaft geometry (D_mb1, D_mb2, L_ms) instead of sizing the shaft')
+    D_mb1 = Float(iotype='in', units='m', desc='given lss outer diameter at main bearing')
+    D_mb2 = Float(iotype='in', units='m', desc='given lss outer diameter at gearbox connection')
+    L_ms = Float(iotype='in', units='m', desc='given distance between main bearing and gearbox connection')
+    C_mb1 = Float(0.0, iotype='in', units='kN', desc='dynamic load rating of main bearing, zero for the catalog bearing fitting D_mb1')
    
     # outputs
     design_torque = Float(iotype='out', units='N*m', desc='lss design torque')
@@ -935,6 +1049,12 @@ class LowSpeedShaft_drive3pt(Component):
     bearing_mass2 = Float(0., iotype='out', units = 'kg', desc='main bearing mass') #zero for 3-pt model
     bearing_location1 = Array(np.array([0,0,0]),iotype='out', units = 'm', desc = 'main bearing 1 center of mass')
     bearing_location2 = Array(np.array([0,0,0]),iotype='out', units = 'm', desc = 'main bearing 2 center of mass')
+    damage_mb1 = Float(iotype='out', desc='Palmgren-Miner damage of lss at main bearing (analysis_only)')
+    L10_mb1 = Float(iotype='out', desc='basic rating life of main bearing in rotations (analysis_only)')
+    shaft_x = Array(iotype='out', units='m', desc='distances from hub center, main bearing to gearbox, of the shaft profiles (shaft_profiles)')
+    shaft_moment = Array(iotype='out', units='N*m', desc='resultant bending moment along the shaft (shaft_profiles)')
+    shaft_slope = Array(iotype='out', units='rad', desc='slope of the shaft in the x-z plane (shaft_profiles)')
+    shaft_deflection = Array(iotype='out', units='m', desc='deflection of the shaft in the x-z plane (shaft_profiles)')
 
     def __init__(self):
         '''
@@ -942,8 +1062,15 @@ class LowSpeedShaft_drive3pt(Component):
         '''
 
         super(LowSpeedShaft_drive3pt, self).__init__()
+
+        self._converged = {} #last statically sized shaft, for warm starts
+        self._workspace = {} #buffers filled in place by the sizing passes
     
     def execute(self):
+        if self.analysis_only:
+            self.fatigue_analysis()
+            return
+
         #Hub Forces
         F_r_x = self.rotor_force_x            #External F_x
         F_r_y = self.rotor_force_y                 #External F_y
@@ -1012,7 +1139,17 @@ class LowSpeedShaft_drive3pt(Component):
         counter=0
         length_max = self.overhang - self.L_rb + (self.gearbox_cm[0] -self.gearbox_length/2.) #modified length limit 7/29
 
-        while abs(check_limit) > tol and L_ms_new < length_max:
+        #warm start just short of the last converged length
+        sign = 0.0
+        warm = self.warm_start and self.length_search == 'root' and 'L_ms' in self._converged \
+               and max(L_ms_0, self._converged['L_ms'][0] - dL) < length_max
+        if warm:
+            [L_ms_new,D_max,D_min,sign] = self._converged['L_ms']
+            L_ms_new = max(L_ms_0, L_ms_new - dL)
+
+        searching = abs(check_limit) > tol and L_ms_new < length_max
+        bracket = []
+        while searching:
             counter =counter+1
             if L_ms_new > 0:
                  L_ms=L_ms_new
@@ -1036,10 +1173,6 @@ class LowSpeedShaft_drive3pt(Component):
             weightGbx = self.gearbox_mass*g                              #gearbox weight
             weightCarrier = self.carrier_mass*g
 
-            len_pts=101;
-            x_ms = np.linspace(L_rb, L_ms+L_rb, len_pts)
-            x_rb = np.linspace(0.0, L_rb, len_pts)
-            y_gp = np.linspace(0, L_gp, len_pts)
 
             #len_my = np.arange(1,len(M_r_y)+1)
             #print ("F_r_x: {0}").format(F_r_x)
@@ -1066,33 +1199,17 @@ class LowSpeedShaft_drive3pt(Component):
             F_cd_z = (weightLSS*cos(radians(gamma)) + weightShrinkDisc*cos(radians(gamma)) + weightGbx*cos(radians(gamma))) - F_mb_z - F_r_z - F_cu_z 
 
 
-            My_ms = np.zeros(2*len_pts)
-            Mz_ms = np.zeros(2*len_pts)
-
-            for k in range(len_pts):
-                My_ms[k] = -M_r_y + weightRotor*cos(radians(gamma))*x_rb[k] + 0.5*weightLSS/L_ms*x_rb[k]**2 - F_r_z*x_rb[k]
-                Mz_ms[k] = -M_r_z - F_r_y*x_rb[k]
-
-            for j in range(len_pts):
-                My_ms[j+len_pts] = -F_r_z*x_ms[j] - M_r_y + weightRotor*cos(radians(gamma))*x_ms[j] - F_mb_z*(x_ms[j]-L_rb) + 0.5*weightLSS/L_ms*x_ms[j]**2
-                Mz_ms[j+len_pts] = -M_r_z - F_mb_y*(x_ms[j]-L_rb) - F_r_y*x_ms[j]
-
-            x_shaft = np.concatenate([x_rb, x_ms])
-
-            MM_max=np.amax((My_ms**2 + Mz_ms**2)**0.5/1000.0)
-            Index=np.argmax((My_ms**2 + Mz_ms**2)**0.5/1000.0)
+            MM_max = max(beam_moment_max(0.0,L_rb,(-M_r_y,weightRotor*cos(radians(gamma))-F_r_z,weightLSS/L_ms),(-M_r_z,-F_r_y,0.),self._workspace),
+                         beam_moment_max(L_rb,L_rb+L_ms,(-M_r_y,weightRotor*cos(radians(gamma))-F_r_z,weightLSS/L_ms,[L_rb],[F_mb_z]),(-M_r_z,-F_r_y,0.,[L_rb],[F_mb_y]),self._workspace))/1000.0
                 
             #print 'Max Moment kNm:'
             #print MM_max
-            #print 'Max moment location m:'
-            #print x_shaft[Index]
 
-            MM_min = ((My_ms[-1]**2+Mz_ms[-1]**2)**0.5/1000.0)
+            MM_min = ((beam_moment(L_rb+L_ms,-M_r_y,weightRotor*cos(radians(gamma))-F_r_z,weightLSS/L_ms,[L_rb],[F_mb_z])**2 \
+                      + beam_moment(L_rb+L_ms,-M_r_z,-F_r_y,0.,[L_rb],[F_mb_y])**2)**0.5/1000.0)
 
             #print 'Max Moment kNm:'
             #print MM_min
-            #print 'Max moment location m:'#
-            #print x_shaft[-1]
 
             #Design shaft OD using distortion energy theory
             
@@ -1124,34 +1241,45 @@ class LowSpeedShaft_drive3pt(Component):
             #print 'New LSS mass kg:'
             #print massLSS_new
 
-            def fx(F_r_z,W_r,gamma,M_r_y,f_mb_z,L_rb,W_ms,L_ms,z):
-                return -F_r_z*z**3/6.0 + W_r*cos(radians(gamma))*z**3/6.0 - M_r_y*z**2/2.0 - f_mb_z*(z-L_rb)**3/6.0 + W_ms/(L_ms + L_rb)/24.0*z**4
-            
-                       
-            D1 = fx(F_r_z,weightRotor,gamma,M_r_y,F_mb_z,L_rb,weightLSS_new,L_ms,L_rb+L_ms)
-            D2 = fx(F_r_z,weightRotor,gamma,M_r_y,F_mb_z,L_rb,weightLSS_new,L_ms,L_rb)
-            C1 = -(D1-D2)/L_ms;
-            C2 = -D2-C1*(L_rb);
-            
+            #shaft supported at main bearing and gearbox
+            [C1,C2] = beam_constants(L_rb,L_rb+L_ms,-M_r_y,weightRotor*cos(radians(gamma))-F_r_z,weightLSS_new/(L_ms + L_rb),[L_rb],[F_mb_z])
             
             I_2=pi/64.0*(D_max**4 - D_in**4)
 
-            def gx(F_r_z,W_r,gamma,M_r_y,f_mb_z,L_rb,W_ms,L_ms,C1,z):
-                return -F_r_z*z**2/2.0 + W_r*cos(radians(gamma))*z**2/2.0 - M_r_y*z - f_mb_z*(z-L_rb)**2/2.0 + W_ms/(L_ms + L_rb)/6.0*z**3 + C1
-
-            theta_y = np.zeros(len_pts)
-            d_y = np.zeros(len_pts)
+            #slope at the gearbox
+            theta_y = beam_slope(L_rb+L_ms,-M_r_y,weightRotor*cos(radians(gamma))-F_r_z,weightLSS_new/(L_ms + L_rb),[L_rb],[F_mb_z],C1)/E/I_2
 
-            for kk in range(len_pts):
-                theta_y[kk]=gx(F_r_z,weightRotor,gamma,M_r_y,F_mb_z,L_rb,weightLSS_new,L_ms,C1,x_ms[kk])/E/I_2
-                d_y[kk]=(fx(F_r_z,weightRotor,gamma,M_r_y,F_mb_z,L_rb,weightLSS_new,L_ms,x_ms[kk])+C1*x_ms[kk]+C2)/E/I_2
-
-            check_limit = abs(abs(theta_y[-1])-TRB1_limit/n_safety_brg)
+            check_limit = abs(abs(theta_y)-TRB1_limit/n_safety_brg)
             #print 'deflection slope'
             #print TRB1_limit
             #print 'threshold'
-            #print theta_y[-1]
-            L_ms_new = L_ms + dL        
+            #print theta_y
+            if self.length_search == 'root':
+                residual = abs(theta_y)-TRB1_limit/n_safety_brg
+                if warm and len(bracket) == 0 and np.sign(residual - tol*sign) != sign:
+                    #the limit is reached short of the warm start, start over cold
+                    warm = False
+                    [L_ms_new,D_max,D_min] = [0.0,1.0,0.2]
+                    continue
+                if len(bracket) == 0:
+                    [L_first,sign] = [L_ms,np.sign(residual)]
+                [L_ms_new, searching] = length_search_step(L_ms, residual, bracket, length_max, tol, L_far=L_first + 2*dL if warm else None)
+            else:
+                L_ms_new = L_ms + dL        
+                searching = abs(check_limit) > tol and L_ms_new < length_max
+
+        if self.length_search == 'root':
+            self._converged['L_ms'] = [L_ms_new,D_max,D_min,sign]
+
+        if self.shaft_profiles:
+            #profiles of the last sizing iterate, main bearing to gearbox
+            len_pts=101
+            x_ms = np.linspace(L_rb, L_ms+L_rb, len_pts)
+            self.shaft_x = x_ms
+            self.shaft_moment = (beam_moment(x_ms,-M_r_y,weightRotor*cos(radians(gamma))-F_r_z,weightLSS/L_ms,[L_rb],[F_mb_z])**2 \
+                                 + beam_moment(x_ms,-M_r_z,-F_r_y,0.,[L_rb],[F_mb_y])**2)**0.5
+            self.shaft_slope = beam_slope(x_ms,-M_r_y,weightRotor*cos(radians(gamma))-F_r_z,weightLSS_new/(L_ms + L_rb),[L_rb],[F_mb_z],C1)/E/I_2
+            self.shaft_deflection = beam_deflection(x_ms,-M_r_y,weightRotor*cos(radians(gamma))-F_r_z,weightLSS_new/(L_ms + L_rb),[L_rb],[F_mb_z],C1,C2)/E/I_2
 
         # fatigue check Taylor Parsons 6/2014
         if check_fatigue == 1 or 2:
@@ -1163,25 +1291,7 @@ class LowSpeedShaft_drive3pt(Component):
           density=7800.0
           n_safety = 2.5
           Sy = 490.0e6 # Pa
-          if self.S_ut > 0:
-            Sut = self.S_ut
-          else:
-            Sut=700.0e6 #Pa
-          Sm=0.9*Sut #for bending situations, material strength at 10^3 cycles
-          C_size=0.6 #diameter larger than 10"
-          C_surf=4.51*(Sut/1e6)**-.265 #machined surface 272*(Sut/1e6)**-.995 #forged
-          C_temp=1 #normal operating temps
-          C_reliab=0.814 #99% reliability
-          C_envir=1. #enclosed environment
-          Se=C_size*C_surf*C_temp*C_reliab*C_envir*.5*Sut #modified endurance limit for infinite life
-
-          if self.fatigue_exponent!=0:
-            SN_b = -1/self.fatigue_exponent
-          else:
-            Nfinal = 5e8 #point where fatigue limit occurs under hypothetical S-N curve TODO adjust to fit actual data
-            z=log10(1e3)-log10(Nfinal)  #assuming no endurance limit (high strength steel)
-            SN_b=1/z*log10(Sm/Se)
-          SN_a=Sm/(1000.**SN_b)
+          [Sut,SN_a,SN_b] = shaft_sn_curve(self.S_ut,self.fatigue_exponent)
           # print 'm:', -1/SN_b
           # print 'a:', SN_a
 
@@ -1195,75 +1305,8 @@ class LowSpeedShaft_drive3pt(Component):
                   rotor_mass = get_rotor_mass(self.machine_rating)
 
               #Rotor Loads calculations using DS472
-              R=rotor_diameter/2.0
-              rotor_torque = (machine_rating * 1000 / DrivetrainEfficiency) / (rotor_freq * (pi/30))
-              Tip_speed_ratio= rotor_freq/30.*pi*R/V_rated
-              rho_air= 1.225 #kg/m^3 density of air
-              p_o = 4./3*rho_air*((4*pi*rotor_freq/60*R/3)**2+V_rated**2)*(pi*R/(blade_number*Tip_speed_ratio*(Tip_speed_ratio**2+1)**(.5)))
-
-              n_c=blade_number*rotor_freq/60 #characteristic frequency on rotor from turbine of given blade number [Hz]
-              N_f=self.availability*n_c*(T_life*365*24*60*60)*exp(-(V_0/weibullA)**weibullk)-exp(-(V_f/weibullA)**weibullk) #number of rotor rotations based off of weibull curve. .827 comes from lower rpm than rated at lower wind speeds
-
-
-              k_b= 2.5 #calculating rotor pressure from all three blades. Use kb=1 for individual blades
-
-              if IEC_Class_Letter == 'A': # From IEC 61400-1 TODO consider calculating based off of 10-minute windspeed and weibull parameters, include neighboring wake effects?
-                I_t=0.18 
-              elif IEC_Class_Letter == 'B':
-                I_t=0.14
-              else:
-                I_t=0.12
-
-              Beta=0.11*k_b*(I_t+0.1)*(weibullA+4.4)
-
-              # find generic standardized stochastic load range distribution
-              def standardrange(N, N_f, Beta, k_b): 
-                  F_delta=(Beta*(log10(N_f)-log10(N)))+0.18
-                  if F_delta>=2*k_b:
-                    F_delta=0.
-                  return F_delta
-
-              def rounddown(x,step):
-                return int(floor(x/step))*step
-
-              def roundup(x,step):
-                  return int(ceil(x/step))*step
-
-              #for analysis with N on log scale, makes larger loads contain finer step sizes
-              num_pts=100
-              N=np.logspace( (log10(N_f)-(2*k_b-0.18)/Beta) , log10(N_f) , endpoint=True , num=num_pts) # with zeros: N=np.logspace(log10(1.0),log10(N_f),endpoint=True,num=num_pts)
-              N_rotor = N_f/3.
-              F_stoch=N.copy()
-
-
-              for i in range(num_pts):
-                  N[i]=roundup(N[i],1)
-
-              #print N
-
-              k_r=0.8 #assuming natural frequency of rotor is significantly larger than rotor rotational frequency
-
-              for i in range(num_pts):
-                F_stoch[i] = standardrange(N[i],N_f,Beta,k_b)
-
-              Fx_factor = (.3649*log(rotor_diameter)-1.074)
-              Mx_factor = (.0799*log(rotor_diameter)-.2577)
-              My_factor = (.172*log(rotor_diameter)-.5943)
-              Mz_factor = (.1659*log(rotor_diameter)-.5795)
-
-              Fx_stoch = (F_stoch.copy()*0.5*p_o*(R))*Fx_factor #divide by 2 to reflect amplitudes?
-              Mx_stoch = (F_stoch.copy()*0.45*p_o*(R)**2)*Mx_factor#*0.31
-              My_stoch = (F_stoch.copy()*0.33*p_o*k_r*(R)**2)*My_factor#*.5*0.25
-              Mz_stoch = (F_stoch.copy()*0.33*p_o*k_r*(R)**2)*Mz_factor#*.5*0.25 
-
-              def Ninterp(S,a,b):
-                  return (S/a)**(1/b)
-
-              def Goodman(S_alt,S_mean,Sut):
-                  return S_alt/(1-(S_mean/Sut))
-
-              Fx_mean=0.5*p_o*R*blade_number*Fx_factor
-              Mx_mean=0.5*rotor_torque*Mx_factor
+              [N,N_f,N_rotor,Fx_stoch,Mx_stoch,My_stoch,Mz_stoch,Fx_mean,Mx_mean] = ds472_load_spectrum(rotor_diameter,rotor_freq,machine_rating,DrivetrainEfficiency,\
+                  V_rated,V_0,V_f,weibullA,weibullk,T_life,self.availability,blade_number,IEC_Class_Letter)
               rotorWeight=rotor_mass*g
 
               # print 'Fx_max:', np.max(Fx_stoch) + Fx_mean
@@ -1273,56 +1316,27 @@ class LowSpeedShaft_drive3pt(Component):
               # print 'occurance:', np.min(N)
 
               #upwind bearing calculations
-              iterationstep=0.01
               diameter_limit = 1.5
-              while True:
+
+              def mb_sufficient(D_max):
                   D_in=sR*D_max
                   D_max = (D_max**4 + D_in**4)**0.25
-                  D_min = (D_min**4 + D_in**4)**0.25
-                  I=(pi/64.0)*(D_max**4-D_in**4)
-                  J=I*2
-                  Area=pi/4.*(D_max**2-D_in**2)
-                  LssWeight=density*9.81*(((pi/12)*(D_max**2+D_min**2+D_max*D_min)*(L_ms))-(pi/4*L_ms*D_in**2))
-
-                  #create stochastic loads across N
-                  stoch_bend1 = (My_stoch**2+Mz_stoch**2)**(0.5)*D_max/(2.*I)
-                  stoch_shear1 = abs(Mx_stoch*D_max/(2.*J))
-                  stoch_normal1 = Fx_stoch/Area*cos(radians(gamma))
-                  stoch_stress1 = ((stoch_bend1+stoch_normal1)**2+3.*stoch_shear1**2)**(0.5)
-                  
-                  #create mean loads
-                  mean_bend1 = 0 #Fz_mean*L_rb*D_max/(2.*I) #not mean, but deterministic
-                  mean_shear1 = Mx_mean*D_max/(2.*J)
-                  mean_normal1 = Fx_mean/Area*cos(radians(gamma))+(rotorWeight+LssWeight)*sin(radians(gamma))
-                  mean_stress1 = ((mean_bend1+mean_normal1)**2+3.*mean_shear1**2)**(0.5)
+                  D_min_in = (D_min**4 + D_in**4)**0.25
+                  LssWeight=density*9.81*(((pi/12)*(D_max**2+D_min_in**2+D_max*D_min_in)*(L_ms))-(pi/4*L_ms*D_in**2))
 
-                  #apply Goodman with compressive (-) mean stress
-                  S_mod_stoch1=Goodman(stoch_stress1,-mean_stress1,Sut)
-
-                  #Use Palmgren-Miner linear damage rule to add damage from stochastic load ranges
-                  DEL_y=Fx_stoch.copy() #initialize
-                  for i in range(num_pts):
-                      DEL_y[i] = N[i]/(Ninterp(S_mod_stoch1[i],SN_a,SN_b))
-
-                  Damage = scp.integrate.simps(DEL_y,x= N, even='avg') #damage from stochastic loading
-
-                  #create deterministic loads occurring N_rotor times
-                  determ_stress1 = abs(rotorWeight*cos(radians(gamma))*L_rb*D_max/(2.*I)) #only deterministic stress at mb1 is bending due to weights
-
-                  S_mod_determ=Goodman(determ_stress1,-mean_stress1,Sut)
-                  # print 'before deterministic Damage:', Damage
-
-                  Damage += N_rotor/(Ninterp(S_mod_determ,SN_a,SN_b))
+                  #only deterministic stress at mb1 is bending due to weights
+                  Damage = ds472_shaft_damage(D_max,D_in,(My_stoch**2+Mz_stoch**2)**(0.5),Mx_stoch,Fx_stoch,rotorWeight*cos(radians(gamma))*L_rb,\
+                      Mx_mean,Fx_mean,rotorWeight+LssWeight,gamma,N,N_rotor,Sut,SN_a,SN_b)
 
                   # print 'Bearing Diameter:', D_max
                   # print 'Damage:', Damage
-                  if Damage < 1 or D_max >= diameter_limit:
-                      # print 'Bearing Diameter:', D_max
-                      # print 'Damage:', Damage
-                      #print (time.time() - start_time), 'seconds of total simulation time'
-                      break
-                  else:
-                      D_max+=iterationstep
+                  return Damage < 1
+
+              D_max = fatigue_diameter(mb_sufficient,D_max,diameter_limit,self.fatigue_tol,16)
+              D_in=sR*D_max
+              D_max = (D_max**4 + D_in**4)**0.25
+              D_min = (D_min**4 + D_in**4)**0.25
+              LssWeight=density*9.81*(((pi/12)*(D_max**2+D_min**2+D_max*D_min)*(L_ms))-(pi/4*L_ms*D_in**2))
 
               #begin bearing calculations
               N_bearings = N/blade_number #rotation number
@@ -1336,7 +1350,7 @@ class LowSpeedShaft_drive3pt(Component):
 
               life_bearing = N_f/blade_number
 
-              [D_max_a,FW_max,bearingmass] = fatigue_for_bearings(D_max, Fr_range, Fa_range, N_bearings, life_bearing, self.mb1Type)
+              [D_max_a,FW_max,bearingmass] = fatigue_for_bearings(D_max, Fr_range, Fa_range, N_bearings, life_bearing, self.mb1Type, self.bearing_selection)
 
           elif check_fatigue == 2:
             Fx = self.rotor_thrust_distribution
@@ -1357,44 +1371,19 @@ class LowSpeedShaft_drive3pt(Component):
             # print Mx*.5
             # print -1/SN_b
 
-            def Ninterp(L_ult,L_range,m):
-                return (L_ult/(.5*L_range))**m #TODO double-check that the input will be the load RANGE instead of load amplitudes. Also, may include means?
-
             #upwind bearing calcs
             diameter_limit = 5.0
-            iterationstep=0.01
-            #upwind bearing calcs
-            while True:
-                Damage = 0
-                Fx_ult = SN_a*(pi/4.*(D_max**2-D_in**2))
-                Fyz_ult = SN_a*(pi*(D_max**4-D_in**4))/(D_max*32*L_rb)
-                Mx_ult = SN_a*(pi*(D_max**4-D_in**4))/(32*(3.**.5)*D_max)
-                Myz_ult = SN_a*(pi*(D_max**4-D_in**4))/(D_max*64.)
-                if Fx_ult and np.all(n_Fx):
-                    Damage+=scp.integrate.simps(n_Fx/Ninterp(Fx_ult,Fx,-1/SN_b),x=n_Fx,even = 'avg')
-                if Fyz_ult:
-                    if np.all(n_Fy):
-                        Damage+=scp.integrate.simps(abs(n_Fy/Ninterp(Fyz_ult,Fy,-1/SN_b)),x=n_Fy,even = 'avg')
-                    if np.all(n_Fz):
-                        Damage+=scp.integrate.simps(abs(n_Fz/Ninterp(Fyz_ult,Fz,-1/SN_b)),x=n_Fz,even = 'avg')
-                if Mx_ult and np.all(n_Mx):
-                    Damage+=scp.integrate.simps(abs(n_Mx/Ninterp(Mx_ult,Mx,-1/SN_b)),x=n_Mx,even = 'avg')
-                if Myz_ult:
-                    if np.all(n_My):
-                        Damage+=scp.integrate.simps(abs(n_My/Ninterp(Myz_ult,My,-1/SN_b)),x=n_My,even = 'avg')
-                    if np.all(n_Mz):
-                        Damage+=scp.integrate.simps(abs(n_Mz/Ninterp(Myz_ult,Mz,-1/SN_b)),x=n_Mz,even = 'avg')
-
-                print 'Upwind Bearing Diameter:', D_max
-                print 'Damage:', Damage
-
-                if Damage <= 1 or D_max >= diameter_limit:
-                    # print 'Upwind Bearing Diameter:', D_max
-                    # print 'Damage:', Damage
-                    #print (time.time() - start_time), 'seconds of total simulation time'
-                    break
-                else:
-                    D_max+=iterationstep
+
+            spectra = {'Fx':(Fx,n_Fx), 'Fy':(Fy,n_Fy), 'Fz':(Fz,n_Fz), 'Mx':(Mx,n_Mx), 'My':(My,n_My), 'Mz':(Mz,n_Mz)}
+
+            def mb_sufficient(D_max):
+                Damage = shaft_range_damage(D_max,D_in,L_rb,SN_a,SN_b,spectra,'3pt')
+                # print 'Upwind Bearing Diameter:', D_max
+                # print 'Damage:', Damage
+                return Damage <= 1
+
+            D_max = fatigue_diameter(mb_sufficient,D_max,diameter_limit,self.fatigue_tol,16)
+            print 'Upwind Bearing Diameter:', D_max
 
             #bearing calcs
             if self.availability != 0 and rotor_freq != 0 and T_life != 0 and V_f != 0 and weibullA != 0:
@@ -1409,14 +1398,22 @@ class LowSpeedShaft_drive3pt(Component):
             Fz1_My = My/L_ms #force in z direction due to My
             Fy1_Fy = -Fy*(L_ms+L_rb)/L_ms
             Fy1_Mz = Mz/L_ms
-            [D_max_a,FW_max,bearingmass] = fatigue2_for_bearings(D_max,self.mb1Type,np.zeros(2),np.array([1,2]),Fy1_Fy,n_Fy/blade_number,Fz1_Fz,n_Fz/blade_number,Fz1_My,n_My/blade_number,Fy1_Mz,n_Mz/blade_number,N_rotations)
+            [D_max_a,FW_max,bearingmass] = fatigue2_for_bearings(D_max,self.mb1Type,np.zeros(2),np.array([1,2]),Fy1_Fy,n_Fy/blade_number,Fz1_Fz,n_Fz/blade_number,Fz1_My,n_My/blade_number,Fy1_Mz,n_Mz/blade_number,N_rotations,self.bearing_selection)
          
         #resize bearing if no fatigue check
         if check_fatigue == 0:
-            [D_max_a,FW_max,bearingmass] = resize_for_bearings(D_max,  self.mb1Type)
+            [D_max_a,FW_max,bearingmass] = resize_for_bearings(D_max,  self.mb1Type, self.bearing_selection)
 
         [D_min_a,FW_min,trash] = resize_for_bearings(D_min,  self.mb2Type) #mb2 is a representation of the gearbox connection
             
+        self.shaft_properties(D_max,D_max_a,D_min_a,D_in,L_ms,L_ms_new,FW_max,FW_min,bearingmass,flange_length,gamma,density)
+
+    def shaft_properties(self,D_max,D_max_a,D_min_a,D_in,L_ms,L_ms_new,FW_max,FW_min,bearingmass,flange_length,gamma,density):
+        '''
+        Length, diameters, mass properties and bearing of the shaft between main bearing and gearbox connection L_ms apart, with
+        diameters resized to D_max_a and D_min_a of facewidths FW_max and FW_min. L_ms_new sets the length.
+        '''
+
         lss_mass_new=(pi/3)*(D_max_a**2+D_min_a**2+D_max_a*D_min_a)*(L_ms-(FW_max+FW_min)/2)*density/4+ \
                          (pi/4)*(D_max_a**2-D_in**2)*density*FW_max+\
                          (pi/4)*(D_min_a**2-D_in**2)*density*FW_min-\
@@ -1475,6 +1472,209 @@ class LowSpeedShaft_drive3pt(Component):
         self.bearing_mass1 = bearingmass
         self.bearing_mass2 = 0.
 
+    def size_batch(self, **cases):
+        '''
+        Static sizing (check_fatigue 0) of the shaft for many load cases in one call. Hub loads, rotor mass and shaft geometry given
+        as keyword arrays replace the component inputs and are broadcast to a common shape; the cases are sized in lockstep and drop
+        out of the length search as they converge. Returns a dict of outputs with one entry per case.
+        '''
+        names = ['rotor_force_x','rotor_force_y','rotor_force_z','rotor_bending_moment_x','rotor_bending_moment_y','rotor_bending_moment_z',
+                 'rotor_mass','rotor_diameter','gearbox_mass','shrink_disc_mass','shaft_angle','shaft_ratio','L_rb','overhang','flange_length']
+        if self.check_fatigue != 0:
+            raise ValueError('batch sizing has no fatigue check, check_fatigue must be 0')
+        for name in cases:
+            if name not in names:
+                raise ValueError('%s is not a batch sizing input, must be one of %s' % (name, ', '.join(names)))
+        values = np.broadcast_arrays(*[np.asarray(cases.get(name, getattr(self, name)), dtype=float) for name in names])
+        shape = values[0].shape
+        [F_r_x,F_r_y,F_r_z,M_r_x,M_r_y,M_r_z,rotor_mass,rotor_diameter,gearbox_mass,shrink_disc_mass,gamma,sR,L_rb,overhang,flange_length] = \
+            [x.ravel() for x in values]
+        n = F_r_x.size
+
+        #input parameters
+        g = 9.81
+        density = 7850.0
+        flange_length = np.where(flange_length == 0, 0.9918*np.exp(.0068*rotor_diameter), flange_length)
+        length_max = overhang - L_rb + (self.gearbox_cm[0] -self.gearbox_length/2.)
+        L_rb = np.where(L_rb == 0, 0.007835*rotor_diameter+0.9642, L_rb)
+        cos_gamma = np.cos(np.radians(gamma))
+        sin_gamma = np.sin(np.radians(gamma))
+        L_ms_0=0.5 # main shaft length downwind of main bearing
+        tol=1e-4
+        L_bg = 6.11 *(self.machine_rating/5.0e3)         #distance from hub center to gearbox yokes
+        L_gb = 0
+        weightRotor = 0 #rotor overhung weight is considered in the load analysis
+        weightShrinkDisc = shrink_disc_mass*g
+        weightGbx = gearbox_mass*g
+
+        TRB1_limit=3.0/60.0/180.0*pi
+        n_safety_brg = 1.0
+        n_safety=2.5
+        Sy = 66000.0 #psi
+        E=2.1e11
+        u_knm_inlb = 8850.745454036
+        u_in_m = 0.0254000508001
+
+        def shaft_diameter(MM, M_r_x):
+            return (16.0*n_safety/pi/Sy*(4.0*(MM*u_knm_inlb)**2 + 3.0*(M_r_x/1000.0*u_knm_inlb)**2)**0.5)**(1.0/3.0)*u_in_m
+
+        #case states, filled in place in the workspace buffers
+        [D_max,D_min,D_in,L_ms,L_ms_new,residual] = [workspace_array(self._workspace,name,(n,)) for name in
+                                                      ['D_max','D_min','D_in','L_ms','L_ms_new','residual']]
+        D_max.fill(1.)
+        D_min.fill(0.2)
+        D_in.fill(0.)
+        L_ms.fill(L_ms_0)
+        L_ms_new.fill(0.)
+        active = L_ms_new < length_max
+        bracket = {}
+        while active.any():
+            i = np.flatnonzero(active)
+            L_ms[i] = np.where(L_ms_new[i] > 0, L_ms_new[i], L_ms_0)
+            L = L_ms[i]
+            weightLSS = pi/3*(D_max[i]**2.0 + D_min[i]**2.0 + D_max[i]*D_min[i])*L*density/4.0*g
+            F_mb_y = M_r_z[i]/L_bg - F_r_y[i]*(L_bg + L_rb[i])/L_bg
+            F_mb_z = (-M_r_y[i] + weightLSS*(L_bg - L/2.0)*cos_gamma[i] + weightShrinkDisc[i]*cos_gamma[i]*(L_bg - L) \
+                      - weightGbx[i]*cos_gamma[i]*L_gb - F_r_z[i]*cos_gamma[i]*(L_bg + L_rb[i]))/L_bg
+
+            loads_y = (-M_r_y[i],weightRotor*cos_gamma[i]-F_r_z[i],weightLSS/L)
+            loads_z = (-M_r_z[i],-F_r_y[i],0.)
+            MM_max = np.maximum(beam_moment_max(0.0,L_rb[i],loads_y,loads_z,self._workspace),
+                                beam_moment_max(L_rb[i],L_rb[i]+L,loads_y+([L_rb[i]],[F_mb_z]),loads_z+([L_rb[i]],[F_mb_y]),self._workspace))/1000.0
+            MM_min = (beam_moment(L_rb[i]+L,*loads_y+([L_rb[i]],[F_mb_z]))**2 + beam_moment(L_rb[i]+L,*loads_z+([L_rb[i]],[F_mb_y]))**2)**0.5/1000.0
+
+            D = shaft_diameter(MM_max,M_r_x[i])
+            D_in[i] = sR[i]*D
+            D_max[i] = (D_in[i]**4.0 + D**4.0)**0.25
+            D_min[i] = (D_in[i]**4.0 + shaft_diameter(MM_min,M_r_x[i])**4.0)**0.25
+            weightLSS_new = (density*pi/12.0*L*(D_max[i]**2.0 + D_min[i]**2.0 + D_max[i]*D_min[i]) - density*pi/4.0*D_in[i]**2.0*L + \
+                              density*pi/4.0*D_max[i]**2*L_rb[i])*g
+
+            #shaft supported at main bearing and gearbox
+            loads_y = (-M_r_y[i],weightRotor*cos_gamma[i]-F_r_z[i],weightLSS_new/(L + L_rb[i]),[L_rb[i]],[F_mb_z])
+            [C1,C2] = beam_constants(L_rb[i],L_rb[i]+L,*loads_y)
+            theta_y = beam_slope(L_rb[i]+L,*loads_y+(C1,))/E/(pi/64.0*(D_max[i]**4 - D_in[i]**4))
+
+            residual.fill(0.)
+            residual[i] = abs(theta_y)-TRB1_limit/n_safety_brg
+            if self.length_search == 'root':
+                [L_ms_new, active] = batch_length_search_step(L_ms, residual, bracket, length_max, tol, active)
+            else:
+                L_ms_new[i] = L + 0.05
+                active[i] = (abs(residual[i]) > tol) & (L_ms_new[i] < length_max[i])
+
+        #resize for bearings, mb2 is a representation of the gearbox connection
+        density = 7800.0
+        [D_max_a,FW_max,bearingmass] = batch_resize_for_bearings(D_max, self.mb1Type, self.bearing_selection).T
+        [D_min_a,FW_min,trash] = batch_resize_for_bearings(D_min, self.mb2Type).T
+
+        lss_mass_new=(pi/3)*(D_max_a**2+D_min_a**2+D_max_a*D_min_a)*(L_ms-(FW_max+FW_min)/2)*density/4+ \
+                         (pi/4)*(D_max_a**2-D_in**2)*density*FW_max+\
+                         (pi/4)*(D_min_a**2-D_in**2)*density*FW_min-\
+                         (pi/4)*(D_in**2)*density*(L_ms+(FW_max+FW_min)/2)
+        mass = lss_mass_new*1.35 # add flange and shrink disk mass
+        length = L_ms_new + (FW_max+FW_min)/2 + flange_length
+
+        # mass properties
+        downwind_location = np.array([self.gearbox_cm[0]-self.gearbox_length/2. , self.gearbox_cm[1] , self.gearbox_cm[2] ])
+        direction = np.column_stack([-cos_gamma, np.zeros(n), sin_gamma])
+        bearing_location1 = downwind_location + L_ms[:,np.newaxis]*direction
+        cm = downwind_location + (0.65*length)[:,np.newaxis]*direction
+        cm[:,[0,2]] = (cm[:,[0,2]]*mass[:,np.newaxis] + downwind_location[[0,2]]*shrink_disc_mass[:,np.newaxis]) / (mass+shrink_disc_mass)[:,np.newaxis]
+        mass = mass + shrink_disc_mass
+        I = np.zeros((n,3))
+        I[:,0] = mass * (D_in ** 2.0 + D_max_a ** 2.0) / 8.0
+        I[:,1] = mass * (D_in ** 2.0 + D_max_a ** 2.0 + (4.0 / 3.0) * (length ** 2.0)) / 16.0
+        I[:,2] = I[:,1]
+
+        outputs = {'length':length, 'diameter1':D_max_a, 'diameter2':D_min_a, 'mass':mass, 'FW_mb':FW_max,
+                   'bearing_mass1':bearingmass, 'bearing_mass2':np.zeros(n)}
+        for name in outputs:
+            outputs[name] = outputs[name].reshape(shape)
+        outputs.update({'cm':cm.reshape(shape + (3,)), 'I':I.reshape(shape + (3,)),
+                        'bearing_location1':bearing_location1.reshape(shape + (3,)), 'bearing_location2':np.zeros(shape + (3,))})
+        return outputs
+
+    def fatigue_analysis(self):
+        '''
+        Fatigue damage of the shaft and L10 life of the main bearing for the given geometry D_mb1, D_mb2, L_ms, without sizing.
+        Uses the rotor load distributions if check_fatigue is 2 and the DS472 load spectrum otherwise.  Length, diameters and mass
+        properties are those of the given shaft, with the catalog bearing fitting it.
+        '''
+        g=9.81
+        density=7800.0
+        gamma=self.shaft_angle
+        blade_number = self.blade_number
+        if self.L_rb == 0: #distance from hub center to main bearing
+            L_rb = get_L_rb(self.rotor_diameter)
+        else:
+            L_rb = self.L_rb
+        L_gb = 0
+        weightGbx = self.gearbox_mass*g
+
+        D_max = self.D_mb1
+        D_min = self.D_mb2
+        L_ms = self.L_ms
+        D_in = self.shaft_ratio*D_max
+
+        [Sut,SN_a,SN_b] = shaft_sn_curve(self.S_ut,self.fatigue_exponent)
+
+        if self.check_fatigue == 2:
+            Fx = self.rotor_thrust_distribution
+            n_Fx = self.rotor_thrust_count
+            Fy = self.rotor_Fy_distribution
+            n_Fy = self.rotor_Fy_count
+            Fz = self.rotor_Fz_distribution
+            n_Fz = self.rotor_Fz_count
+            Mx = self.rotor_torque_distribution
+            n_Mx = self.rotor_torque_count
+            My = self.rotor_My_distribution
+            n_My = self.rotor_My_count
+            Mz = self.rotor_Mz_distribution
+            n_Mz = self.rotor_Mz_count
+
+            spectra = {'Fx':(Fx,n_Fx), 'Fy':(Fy,n_Fy), 'Fz':(Fz,n_Fz), 'Mx':(Mx,n_Mx), 'My':(My,n_My), 'Mz':(Mz,n_Mz)}
+            self.damage_mb1 = shaft_range_damage(D_max,D_in,L_rb,SN_a,SN_b,spectra,'3pt')
+
+            #bearing loads
+            Fz1_Fz = Fz*(L_ms+L_rb)/L_ms
+            Fz1_My = My/L_ms
+            Fy1_Fy = -Fy*(L_ms+L_rb)/L_ms
+            Fy1_Mz = Mz/L_ms
+            [P_eq,p] = equivalent_bearing_load2(self.mb1Type,np.zeros(2),np.array([1,2]),Fy1_Fy,n_Fy/blade_number,Fz1_Fz,n_Fz/blade_number,Fz1_My,n_My/blade_number,Fy1_Mz,n_Mz/blade_number)
+
+        else:
+            rotor_mass = self.rotor_mass
+            if rotor_mass < 100:
+                rotor_mass = get_rotor_mass(self.machine_rating)
+            [N,N_f,N_rotor,Fx_stoch,Mx_stoch,My_stoch,Mz_stoch,Fx_mean,Mx_mean] = ds472_load_spectrum(self.rotor_diameter,self.rotor_freq,self.machine_rating,self.DrivetrainEfficiency,\
+                self.Vrated,self.cut_in,self.cut_out,self.weibull_A,self.weibull_k,self.T_life,self.availability,blade_number,self.IEC_Class)
+            rotorWeight=rotor_mass*g
+            LssWeight=density*9.81*(((pi/12)*(D_max**2+D_min**2+D_max*D_min)*(L_ms))-(pi/4*L_ms*D_in**2))
+
+            self.damage_mb1 = ds472_shaft_damage(D_max,D_in,(My_stoch**2+Mz_stoch**2)**(0.5),Mx_stoch,Fx_stoch,rotorWeight*cos(radians(gamma))*L_rb,\
+                Mx_mean,Fx_mean,rotorWeight+LssWeight,gamma,N,N_rotor,Sut,SN_a,SN_b)
+
+            #bearing loads
+            N_bearings = N/blade_number
+            Fz1stoch = (-My_stoch)/(L_ms)
+            Fy1stoch = Mz_stoch/L_ms
+            Fz1determ = (weightGbx*L_gb - LssWeight*.5*L_ms - rotorWeight*(L_ms+L_rb)) / (L_ms)
+            Fr_range = ((abs(Fz1stoch)+abs(Fz1determ))**2 +Fy1stoch**2)**.5
+            Fa_range = Fx_stoch*cos(radians(gamma)) + (rotorWeight+LssWeight)*sin(radians(gamma))
+            [P_eq,p] = equivalent_bearing_load(Fr_range,Fa_range,N_bearings,self.mb1Type)
+
+        self.L10_mb1 = bearing_life(D_max,self.mb1Type,P_eq,p,self.C_mb1)
+
+        #mass properties of the given shaft, on the catalog bearing fitting it
+        if self.flange_length == 0:
+            flange_length = 0.9918*exp(.0068*self.rotor_diameter)
+        else:
+            flange_length = self.flange_length
+        [D_a,FW_max,bearingmass] = resize_for_bearings(D_max, self.mb1Type, self.bearing_selection)
+        [D_a,FW_min,trash] = resize_for_bearings(D_min, self.mb2Type) #mb2 is a representation of the gearbox connection
+        self.shaft_properties(D_max,D_max,D_min,D_in,L_ms,L_ms,FW_max,FW_min,bearingmass,flange_length,gamma,density)
+
 #-------------------------------------------------------------------------------
 
 class LowSpeedShaft_drive(Component):
@@ -1741,6 +1941,9 @@ class Gearbox_drive(Component):
     #eff = Float(iotype='in', desc='drivetrain efficiency')
     ratio_type = Str(iotype='in', desc='optimal or empirical stage ratios')
     shaft_type = Str(iotype='in', desc = 'normal or short shaft length')
+    warm_start = Bool(False, iotype='in', desc = 'start the optimal stage ratios from the last ones of the same configuration, falling back to the cube root guess')
+    ratio_table = Bool(False, iotype='in', desc = 'interpolate optimal stage ratios in a table solved once per configuration and planet numbers')
+    ratio_solver = Enum('cobyla', ('cobyla','newton'), iotype='in', desc = 'optimal stage ratio solver: COBYLA on the constrained volume or newton steps with the ratio product eliminated')
 
     # outputs
     stage_masses = Array(np.array([0.0, 0.0, 0.0, 0.0]), iotype='out', units='kg', desc='individual gearbox stage masses')
@@ -1750,6 +1953,7 @@ class Gearbox_drive(Component):
     length = Float(iotype='out', units='m', desc='gearbox length')
     height = Float(iotype='out', units='m', desc='gearbox height')
     diameter = Float(iotype='out', units='m', desc='gearbox diameter')
+    stage_ratio_error = Float(0.0, iotype='out', desc='bound on the relative error of the interpolated stage ratios over the table interval of the gear ratio, zero when solved (ratio_table)')
 
 
     def __init__(self):
@@ -1761,6 +1965,8 @@ class Gearbox_drive(Component):
 
         super(Gearbox_drive,self).__init__()
 
+        self._converged = {} #last optimal stage ratios per configuration and planet numbers, for warm starts
+
     def execute(self):
 
         self.stageRatio=np.zeros([3,1])
@@ -1772,7 +1978,16 @@ class Gearbox_drive(Component):
         #print self.Np
         #print self.ratio_type
         #print self.gear_configuration
-        self.stageRatio=self.stageRatioCalc(self.gear_ratio,self.Np,self.ratio_type,self.gear_configuration)
+        self.stageRatio = None
+        self.stage_ratio_error = 0.0
+        if self.ratio_type == 'optimal' and self.ratio_table:
+            table = stage_ratio_table((type(self).__name__,self.ratio_solver,self.gear_configuration,tuple(np.ravel(self.Np))),
+                                      lambda r: self.stageRatioCalc(r,self.Np,self.ratio_type,self.gear_configuration))
+            self.stageRatio = interpolate_stage_ratios(table,self.gear_ratio)
+            if self.stageRatio is not None:
+                self.stage_ratio_error = stage_ratio_error_bound(table,self.gear_ratio)
+        if self.stageRatio is None: #outside of the table
+            self.stageRatio=self.stageRatioCalc(self.gear_ratio,self.Np,self.ratio_type,self.gear_configuration)
         #print self.stageRatio
 
         m=self.gbxWeightEst(self.gear_configuration,self.gear_ratio,self.Np,self.ratio_type,self.shaft_type,self.rotor_torque)
@@ -1915,6 +2130,10 @@ class Gearbox_drive(Component):
                 x=[overallRatio**(1.0/3.0),overallRatio**(1.0/3.0),overallRatio**(1.0/3.0)]
         
         elif ratio_type == 'optimal':
+            key = (type(self).__name__,self.ratio_solver,config,tuple(np.ravel(Np)),float(overallRatio))
+            x = cached_stage_ratios(key)
+            if x is not None:
+                return x
             x=np.zeros([3,1])
 
             if config == 'eep':
@@ -1936,7 +2155,8 @@ class Gearbox_drive(Component):
                 def constr2(x,overallRatio):
                     return overallRatio-x[0]*x[1]*x[2]
 
-                x=opt.fmin_cobyla(volume, x0,[constr1,constr2],consargs=[overallRatio],rhoend=1e-7, iprint = 0)
+                stages=[lambda x: epicyclic_stage_volume(x,B_1,K_r1),lambda x: epicyclic_stage_volume(x,B_2,K_r2),parallel_stage_volume]
+                x=self.stageRatioMinimize(volume,x0,[constr1,constr2],overallRatio,Np,config,stages)
         
             elif config == 'eep_3':
                 #fixes last stage ratio at 3
@@ -1961,7 +2181,8 @@ class Gearbox_drive(Component):
                 def constr4(x,overallRatio):
                     return 3.0-x[2]
 
-                x=opt.fmin_cobyla(volume, x0,[constr1,constr2,constr3,constr4],consargs=[overallRatio],rhoend=1e-7,iprint=0)
+                stages=[lambda x: epicyclic_stage_volume(x,B_1,K_r1),lambda x: epicyclic_stage_volume(x,B_2,K_r2),parallel_stage_volume]
+                x=self.stageRatioMinimize(volume,x0,[constr1,constr2,constr3,constr4],overallRatio,Np,config,stages,{2:3.0})
             
             elif config == 'eep_2':
                 #fixes final stage ratio at 2
@@ -1980,7 +2201,8 @@ class Gearbox_drive(Component):
                 def constr2(x,overallRatio):
                     return overallRatio-x[0]*x[1]*x[2]
 
-                x=opt.fmin_cobyla(volume, x0,[constr1,constr2],consargs=[overallRatio],rhoend=1e-7, iprint = 0)
+                stages=[lambda x: epicyclic_stage_volume(x,B_1,K_r1),lambda x: epicyclic_stage_volume(x,B_2,K_r2),parallel_stage_volume]
+                x=self.stageRatioMinimize(volume,x0,[constr1,constr2],overallRatio,Np,config,stages)
             elif config == 'epp':
                 #fixes last stage ratio at 3
                 x0=[overallRatio**(1.0/3.0),overallRatio**(1.0/3.0),overallRatio**(1.0/3.0)]
@@ -2000,7 +2222,8 @@ class Gearbox_drive(Component):
                 def constr2(x,overallRatio):
                     return overallRatio-x[0]*x[1]*x[2]
                 
-                x=opt.fmin_cobyla(volume, x0,[constr1,constr2],consargs=[overallRatio],rhoend=1e-7,iprint=0)
+                stages=[lambda x: epicyclic_stage_volume(x,B_1,K_r),parallel_stage_volume,parallel_stage_volume]
+                x=self.stageRatioMinimize(volume,x0,[constr1,constr2],overallRatio,Np,config,stages)
                 
             else:  # what is this subroutine for?  Yi on 04/16/2014
                 x0=[overallRatio**(1.0/3.0),overallRatio**(1.0/3.0),overallRatio**(1.0/3.0)]
@@ -2015,11 +2238,44 @@ class Gearbox_drive(Component):
                 def constr2(x,overallRatio):
                     return overallRatio-x[0]*x[1]*x[2]
 
-                x=opt.fmin_cobyla(volume, x0,[constr1,constr2],consargs=[overallRatio],rhoend=1e-7, iprint = 0)
+                stages=[lambda x: epicyclic_stage_volume(x,B_1,K_r),parallel_stage_volume,parallel_stage_volume]
+                x=self.stageRatioMinimize(volume,x0,[constr1,constr2],overallRatio,Np,config,stages)
+            cache_stage_ratios(key,x)
         else:
             x='fail'
                   
         return x
+
+    def stageRatioMinimize(self, volume, x0, constraints, overallRatio, Np, config, stages, fixed=None):
+        '''
+        Minimizes the gearbox volume over the stage ratios with COBYLA from x0.  In warm_start mode the search starts from the last
+        optimal stage ratios of the configuration scaled to overallRatio, and is repeated from x0 if the result violates the constraints.
+        The newton ratio_solver minimizes the volume terms of the stages with the product constraint eliminated and the stages in fixed
+        held constant, falling back to COBYLA if it does not converge.
+        '''
+
+        key = (config, tuple(Np))
+        x = None
+        x_warm = None
+        if self.warm_start and key in self._converged:
+            x_warm = self._converged[key]*(overallRatio/np.prod(self._converged[key]))**(1.0/3.0)
+        if self.ratio_solver == 'newton':
+            solution = None
+            if x_warm is not None:
+                solution = solve_stage_ratios(overallRatio, stages, x_warm, fixed)
+            if solution is None:
+                solution = solve_stage_ratios(overallRatio, stages, x0, fixed)
+            if solution is not None:
+                x = solution[0]
+        elif x_warm is not None:
+            x = opt.fmin_cobyla(volume, x_warm, constraints, consargs=[overallRatio], rhobeg=0.1, rhoend=1e-7, iprint=0)
+            if min([constr(x,overallRatio) for constr in constraints]) < -1e-6*overallRatio or not np.isfinite(volume(x)):
+                x = None
+        if x is None:
+            x = opt.fmin_cobyla(volume, x0, constraints, consargs=[overallRatio], rhoend=1e-7, iprint=0)
+        self._converged[key] = x
+
+        return x
         
 #---------------------------------------------------------------------------------------------------------------
 
@@ -2060,6 +2316,9 @@ class Bedplate_drive(Component):
 
     #parameters
     uptower_transformer = Bool(iotype = 'in', desc = 'Boolean stating if transformer is uptower')
+    warm_start = Bool(False, iotype = 'in', desc = 'bracket the I-beam scale from the last bedplate sized by this component')
+    section_search = Enum('root', ('root','step'), iotype = 'in', desc = 'sizing of the I-beams on the stress and deflection limits: bracketed root solve on the section scale or fixed dimension steps')
+    section_catalog = Enum('synthetic', ('synthetic','rolled','welded','standard'), iotype = 'in', desc = 'steel rear I-beam sections: grown synthetic section, or lightest rolled HEB beam, welded plate girder or either from the standard steel sections')
 
     #outputs
     mass = Float(0.0, iotype='out', units='kg', desc='overall component mass')
@@ -2075,6 +2334,8 @@ class Bedplate_drive(Component):
 
         super(Bedplate_drive,self).__init__()
 
+        self._converged = {} #last I-beam scales of the rear and front sections, for warm starts
+
     def execute(self):
         #Model bedplate as 2 parallel I-beams with a rear steel frame and a front cast frame
         #Deflection constraints applied at each bedplate end
@@ -2114,12 +2375,6 @@ class Bedplate_drive(Component):
         rotorFz=abs(self.rotor_force_z)
         rotorMy=abs(self.rotor_bending_moment_y)
 
-        #initial I-beam dimensions
-        tf = 0.01905
-        tw = 0.0127
-        h0 = 0.6096
-        b0 = h0/2.0
-
         def midDeflection(totalLength,loadLength,load,E,I):
           defl = load*loadLength**2.0*(3.0*totalLength - loadLength)/(6.0*E*I)
           return defl
@@ -2138,56 +2393,45 @@ class Bedplate_drive(Component):
             gbx_location = 0
             gbx_mass = 0
 
-        rootStress = 250e6
-        totalTipDefl = 1.0
         stressTol = 5e5
         deflTol = 1e-4
-        counter = 0
         defl_denom = 1000 #factor in deflection check
         stress_mult = 6 #modified to fit industry data
 
         stressMax = 620e6 #yeild of alloy steel
         deflMax = rearTotalLength/defl_denom
 
-        while rootStress*stress_mult - stressMax >  stressTol or totalTipDefl - deflMax >  deflTol:
-          counter += 1
-          bi = (b0-tw)/2.0
-          hi = h0-2.0*tf
-          I = b0*h0**3/12.0 - 2*bi*hi**3/12.0
-          A = b0*h0 - 2.0*bi*hi
-          w=A*density
-          #Tip Deflection for load not at end
+        def rearBeam(I,A,h0):
+            w=A*density
+            #Tip Deflection for load not at end
           
-          hssTipDefl = midDeflection(rearTotalLength,self.hss_location,self.hss_mass*g/2,E,I)
-          genTipDefl = midDeflection(rearTotalLength,self.generator_location,self.generator_mass*g/2,E,I)
-          convTipDefl = midDeflection(rearTotalLength,convLoc,convMass*g/2,E,I)
-          transTipDefl = midDeflection(rearTotalLength,transLoc,self.transformer_mass*g/2,E,I)
-          gbxTipDefl = midDeflection(rearTotalLength,gbx_location,gbx_mass*g/2,E,I)
-          selfTipDefl = distDeflection(rearTotalLength,w*g,E,I)
-
-          totalTipDefl = hssTipDefl + genTipDefl + convTipDefl + transTipDefl +  selfTipDefl + gbxTipDefl
+            hssTipDefl = midDeflection(rearTotalLength,self.hss_location,self.hss_mass*g/2,E,I)
+            genTipDefl = midDeflection(rearTotalLength,self.generator_location,self.generator_mass*g/2,E,I)
+            convTipDefl = midDeflection(rearTotalLength,convLoc,convMass*g/2,E,I)
+            transTipDefl = midDeflection(rearTotalLength,transLoc,self.transformer_mass*g/2,E,I)
+            gbxTipDefl = midDeflection(rearTotalLength,gbx_location,gbx_mass*g/2,E,I)
+            selfTipDefl = distDeflection(rearTotalLength,w*g,E,I)
+
+            totalTipDefl = hssTipDefl + genTipDefl + convTipDefl + transTipDefl +  selfTipDefl + gbxTipDefl
           
-          #root stress
-          totalBendingMoment=(self.hss_location*self.hss_mass + self.generator_location*self.generator_mass + convLoc*convMass + transLoc*self.transformer_mass + w*rearTotalLength**2/2.0)*g
-          rootStress = totalBendingMoment*h0/(2.*I)
+            #root stress
+            totalBendingMoment=(self.hss_location*self.hss_mass + self.generator_location*self.generator_mass + convLoc*convMass + transLoc*self.transformer_mass + w*rearTotalLength**2/2.0)*g
+            rootStress = totalBendingMoment*h0/(2.*I)
 
-          #mass
-          steelVolume = A*rearTotalLength
-          steelMass = steelVolume*density
+            return totalTipDefl, rootStress
 
-          #2 parallel I beams
-          totalSteelMass = 2.0*steelMass
+        [tf,tw,b0,h0,A,I,s] = self.beamSize('rear',rearBeam,stressMax,deflMax,stressTol,deflTol,stress_mult)
+        [rearTotalTipDefl,rearBendingStress] = rearBeam(I,A,h0)
 
-          rearTotalTipDefl=totalTipDefl
-          rearBendingStress=rootStress
+        #mass
+        steelVolume = A*rearTotalLength
+        steelMass = steelVolume*density
 
-          tf += 0.002 
-          tw += 0.002
-          b0 += 0.006
-          h0 += 0.006
-
-          rearCounter = counter
+        #2 parallel I beams
+        totalSteelMass = 2.0*steelMass
 
+        if self.section_search == 'step' and s is not None: #dimensions the stepping loop ended on, one step past the sized section
+            [tf,tw,b0,h0] = self.beamDimensions(s + 1)
         rearHeight = h0
 
         #Front cast section:
@@ -2200,60 +2444,42 @@ class Bedplate_drive(Component):
         E=169e9 #EN-GJS-400-18-LT http://www.claasguss.de/html_e/pdf/THBl2_engl.pdf
         castDensity = 7100
 
-        tf = 0.01905
-        tw = 0.0127
-        h0 = 0.6096
-        b0 = h0/2.0
-
-        rootStress = 250e6
-        totalTipDefl = 1.0
-        counter = 0
-
         deflMax = frontTotalLength/defl_denom
         stressMax = 200e6
 
-        while rootStress*stress_mult - stressMax >  stressTol or totalTipDefl - deflMax >  deflTol:
-          counter += 1
-          bi = (b0-tw)/2.0
-          hi = h0-2.0*tf
-          I = b0*h0**3/12.0 - 2*bi*hi**3/12.0
-          A = b0*h0 - 2.0*bi*hi
-          w=A*castDensity
-
-          #Tip Deflection for load not at end
-          gbxTipDefl = midDeflection(frontTotalLength,gbx_mass,gbx_mass*g/2.0,E,I)
-          mb1TipDefl = midDeflection(frontTotalLength,mb1_location,self.mb1_mass*g/2.0,E,I)
-          mb2TipDefl = midDeflection(frontTotalLength,mb2_location,self.mb2_mass*g/2.0,E,I)
-          lssTipDefl = midDeflection(frontTotalLength,lss_location,self.lss_mass*g/2.0,E,I)
-          rotorTipDefl = midDeflection(frontTotalLength,rotorLoc,self.rotor_mass*g/2.0,E,I)
-          rotorFzTipDefl = midDeflection(frontTotalLength,rotorLoc,rotorFz/2.0,E,I)
-          selfTipDefl = distDeflection(frontTotalLength,w*g,E,I)
-          rotorMyTipDefl = rotorMy/2.0*frontTotalLength**2/(2.0*E*I)
-
-          totalTipDefl = mb1TipDefl + mb2TipDefl + lssTipDefl  + rotorTipDefl + selfTipDefl +rotorMyTipDefl + rotorFzTipDefl + gbxTipDefl
+        def frontBeam(I,A,h0):
+            w=A*castDensity
 
-          #root stress
-          totalBendingMoment=(mb1_location*self.mb1_mass/2.0 + mb2_location*self.mb2_mass/2.0 + lss_location*self.lss_mass/2.0 + w*frontTotalLength**2/2.0 + rotorLoc*self.rotor_mass/2.0)*g + rotorLoc*rotorFz/2.0 +rotorMy/2.0
-          rootStress = totalBendingMoment*h0/2/I
+            #Tip Deflection for load not at end
+            gbxTipDefl = midDeflection(frontTotalLength,gbx_mass,gbx_mass*g/2.0,E,I)
+            mb1TipDefl = midDeflection(frontTotalLength,mb1_location,self.mb1_mass*g/2.0,E,I)
+            mb2TipDefl = midDeflection(frontTotalLength,mb2_location,self.mb2_mass*g/2.0,E,I)
+            lssTipDefl = midDeflection(frontTotalLength,lss_location,self.lss_mass*g/2.0,E,I)
+            rotorTipDefl = midDeflection(frontTotalLength,rotorLoc,self.rotor_mass*g/2.0,E,I)
+            rotorFzTipDefl = midDeflection(frontTotalLength,rotorLoc,rotorFz/2.0,E,I)
+            selfTipDefl = distDeflection(frontTotalLength,w*g,E,I)
+            rotorMyTipDefl = rotorMy/2.0*frontTotalLength**2/(2.0*E*I)
 
-          #mass
-          castVolume = A*frontTotalLength
-          castMass = castVolume*castDensity
+            totalTipDefl = mb1TipDefl + mb2TipDefl + lssTipDefl  + rotorTipDefl + selfTipDefl +rotorMyTipDefl + rotorFzTipDefl + gbxTipDefl
 
-          #2 parallel I-beams
-          totalCastMass = 2.0*castMass
+            #root stress
+            totalBendingMoment=(mb1_location*self.mb1_mass/2.0 + mb2_location*self.mb2_mass/2.0 + lss_location*self.lss_mass/2.0 + w*frontTotalLength**2/2.0 + rotorLoc*self.rotor_mass/2.0)*g + rotorLoc*rotorFz/2.0 +rotorMy/2.0
+            rootStress = totalBendingMoment*h0/2/I
 
+            return totalTipDefl, rootStress
 
-          frontTotalTipDefl=totalTipDefl
-          frontBendingStress=rootStress
+        [tf,tw,b0,h0,A,I,s] = self.beamSize('front',frontBeam,stressMax,deflMax,stressTol,deflTol,stress_mult)
+        [frontTotalTipDefl,frontBendingStress] = frontBeam(I,A,h0)
 
-          tf += 0.002 
-          tw += 0.002
-          b0 += 0.006
-          h0 += 0.006
+        #mass
+        castVolume = A*frontTotalLength
+        castMass = castVolume*castDensity
 
-          frontCounter=counter
+        #2 parallel I-beams
+        totalCastMass = 2.0*castMass
 
+        if self.section_search == 'step' and s is not None:
+            [tf,tw,b0,h0] = self.beamDimensions(s + 1)
         frontHeight = h0
 
         #frame multiplier for front support
@@ -2301,6 +2527,75 @@ class Bedplate_drive(Component):
         
         # print 'front length and mass:', frontTotalLength, totalCastMass
         # print 'rear length and mass:', rearTotalLength, totalSteelMass 
+
+    def beamDimensions(self, s):
+        '''
+        I-beam dimensions [tf, tw, b0, h0] at scale s: the initial section grown by s steps of 2 mm in the thicknesses and 6 mm in the
+        width and height.
+        '''
+
+        h0 = 0.6096
+        return [0.01905 + s*0.002, 0.0127 + s*0.002, h0/2.0 + s*0.006, h0 + s*0.006]
+
+    def beamSize(self, section, beam, stressMax, deflMax, stressTol, deflTol, stress_mult):
+        '''
+        I-beam [tf, tw, b0, h0, A, I, s] of a bedplate section: dimensions, area and second moment of area of the lightest section
+        whose tip deflection and root stress times stress_mult computed by beam(I, A, h0) meet deflMax and stressMax, and its scale.
+        With a section_catalog the steel rear section is looked up and has no scale (None), falling back to the synthetic section
+        if none suffices.  The cast front section is always synthetic.  The synthetic section is grown from the initial dimensions (beamDimensions), and as both limits fall as it grows
+        the scale is bracketed and solved for.  In step mode (section_search) the scale is a whole number of steps and the limits
+        are met within deflTol and stressTol, as when the section is grown one step at a time.  In warm_start mode the bracket
+        starts from the last scale of the section.
+        '''
+
+        if self.section_catalog != 'synthetic' and section == 'rear':
+            index = self.beamLookup(beam, stressMax, deflMax, stress_mult)
+            if index is not None:
+                catalog = get_section_catalog(self.section_catalog)
+                return [catalog[field][index] for field in ['tf', 'tw', 'b', 'h', 'A', 'I']] + [None]
+            print 'SUITABLE SECTION NOT FOUND IN CATALOG... SIZING SYNTHETIC SECTION'
+
+        steps = self.section_search == 'step'
+        if steps:
+            [stressMax, deflMax] = [stressMax + stressTol, deflMax + deflTol]
+
+        def residual(s):
+            [tf, tw, b0, h0] = self.beamDimensions(s)
+            [A, I] = i_section(h0, b0, tw, tf)
+            [totalTipDefl, rootStress] = beam(I, A, h0)
+            return max(rootStress*stress_mult/stressMax, totalTipDefl/deflMax) - 1.0
+
+        s_0 = 0.
+        if self.warm_start and section in self._converged:
+            s_0 = self._converged[section]
+        s = section_scale(residual, s_0, steps)
+        self._converged[section] = s
+
+        [tf, tw, b0, h0] = self.beamDimensions(s)
+        [A, I] = i_section(h0, b0, tw, tf)
+        return [tf, tw, b0, h0, A, I, s]
+
+    def beamLookup(self, beam, stressMax, deflMax, stress_mult):
+        '''
+        Index in the section_catalog of the lightest section whose tip deflection and root stress times stress_mult computed by
+        beam(I, A, h0) meet deflMax and stressMax, or None.  Both are linear in the beam weight, so the second moment of area and
+        section modulus needed grow with the area.  The lookup is repeated for the area of the section found until it carries its
+        own weight.
+        '''
+
+        #loads with unit second moment of area and section modulus, without and with a unit area
+        [defl_0, stress_0] = beam(1.0, 0.0, 2.0)
+        [defl_1, stress_1] = beam(1.0, 1.0, 2.0)
+
+        catalog = get_section_catalog(self.section_catalog)
+        A = 0.
+        while True:
+            I_min = (defl_0 + (defl_1 - defl_0)*A)/deflMax
+            W_min = (stress_0 + (stress_1 - stress_0)*A)*stress_mult/stressMax
+            index = lightest_section_index(I_min, W_min, self.section_catalog)
+            if index is None or catalog['A'][index] <= A:
+                return index
+            A = catalog['A'][index]
         
 #---------------------------------------------------------------------------------------------------------------
 
@@ -0,0 +1,98 @@
+"""
+shaft_beam.py
+Closed-form bending moment, slope and deflection of the low speed shaft as a beam, evaluated over whole grids of shaft positions
+
+Copyright (c) NREL. All rights reserved.
+"""
+
+import numpy as np
+
+#---------shaft beam-----------#
+
+#positions z are measured from the hub center along the shaft. loads are the hub moment M_0, the net transverse hub force F_0
+#(rotor weight component less hub force), a uniform shaft weight w per unit length from the hub center and point forces F at
+#positions z_F (bearing reactions) acting on the segment of shaft evaluated. slope and deflection are E*I times the physical values
+
+def beam_moment(z,M_0,F_0,w,z_F=(),F=()):
+  #bending moment
+  z = np.asarray(z,dtype=float)
+  M = M_0 + F_0*z + 0.5*w*z**2
+  for z_i,F_i in zip(z_F,F):
+    M = M - F_i*(z - z_i)
+  return M
+
+def beam_slope(z,M_0,F_0,w,z_F=(),F=(),C1=0.):
+  #integral of beam_moment plus the integration constant C1
+  z = np.asarray(z,dtype=float)
+  theta = M_0*z + F_0*z**2/2.0 + w*z**3/6.0 + C1
+  for z_i,F_i in zip(z_F,F):
+    theta = theta - F_i*(z - z_i)**2/2.0
+  return theta
+
+def beam_deflection(z,M_0,F_0,w,z_F=(),F=(),C1=0.,C2=0.):
+  #double integral of beam_moment plus the integration constants C1*z + C2
+  z = np.asarray(z,dtype=float)
+  d = M_0*z**2/2.0 + F_0*z**3/6.0 + w*z**4/24.0 + C1*z + C2
+  for z_i,F_i in zip(z_F,F):
+    d = d - F_i*(z - z_i)**3/6.0
+  return d
+
+def beam_constants(z_a,z_b,M_0,F_0,w,z_F=(),F=()):
+  #integration constants C1, C2 of a shaft supported (zero deflection) at z_a and z_b
+  [d_a,d_b] = beam_deflection(np.array([z_a,z_b]),M_0,F_0,w,z_F,F)
+  C1 = -(d_b-d_a)/(z_b-z_a)
+  C2 = -d_a-C1*z_a
+  return C1, C2
+
+def beam_moment_coefficients(M_0,F_0,w,z_F=(),F=()):
+  #polynomial coefficients of beam_moment in z, highest power first
+  a_1 = F_0
+  a_0 = M_0
+  for z_i,F_i in zip(z_F,F):
+    a_1 = a_1 - F_i
+    a_0 = a_0 + F_i*z_i
+  return 0.5*w, a_1, a_0
+
+def workspace_array(workspace,name,shape):
+  #float array of the given shape to be filled in place, a view of a buffer kept in the dict workspace between calls. the buffer
+  #is only reallocated when it is too small, so a shrinking set of load cases reuses it
+  size = int(np.prod(shape))
+  if name not in workspace or workspace[name].size < size:
+    workspace[name] = np.empty(size)
+  return workspace[name][:size].reshape(shape)
+
+def beam_moment_max(z_a,z_b,loads_y,loads_z,workspace=None):
+  #largest resultant bending moment on the segment [z_a,z_b]. loads_y and loads_z are the (M_0,F_0,w[,z_F,F]) of the two bending planes,
+  #scalars or arrays of load cases. both moments are quadratic in z, so the squared resultant is a quartic whose maximum lies at a segment
+  #end or a root of its cubic derivative. the roots are the eigenvalues of the companion matrix, clipped to the segment. the companion
+  #matrices and candidate points are filled in place in the buffers of the dict workspace when given
+  if workspace is None:
+    workspace = {}
+  [a,b,c] = beam_moment_coefficients(*loads_y)
+  [d,e,f] = beam_moment_coefficients(*loads_z)
+  [a,b,c,d,e,f,z_a,z_b] = np.broadcast_arrays(*[np.asarray(x,dtype=float) for x in [a,b,c,d,e,f,z_a,z_b]])
+  MM2 = [a**2 + d**2, 2.*(a*b + d*e), b**2 + 2.*a*c + e**2 + 2.*d*f, 2.*(b*c + e*f), c**2 + f**2]
+
+  lead = np.where(MM2[0] != 0, 4.*MM2[0], 1.)
+  companion = workspace_array(workspace,'companion',a.shape + (3,3))
+  companion.fill(0.)
+  companion[...,0,0] = -3.*MM2[1]/lead
+  companion[...,0,1] = -2.*MM2[2]/lead
+  companion[...,0,2] = -MM2[3]/lead
+  companion[...,1,0] = 1.
+  companion[...,2,1] = 1.
+  z = np.real(np.linalg.eigvals(companion))
+  #linear moments, the derivative is linear too
+  linear = MM2[0] == 0
+  z[linear,0] = np.where(MM2[2] != 0, -MM2[3]/np.where(MM2[2] != 0, 2.*MM2[2], 1.), z_a)[linear]
+
+  points = workspace_array(workspace,'points',a.shape + (5,))
+  points[...,0] = z_a
+  points[...,1] = z_b
+  np.clip(z, z_a[...,np.newaxis], z_b[...,np.newaxis], out=points[...,2:])
+  MM = workspace_array(workspace,'moments',a.shape + (5,))
+  MM[...] = MM2[0][...,np.newaxis]
+  for c_i in MM2[1:]:
+    MM *= points
+    MM += c_i[...,np.newaxis]
+  return np.sqrt(np.amax(MM, axis=-1))[()]